@@ -1,26 +1,39 @@
 import streamlit as st
 import pandas as pd
-import os, io, re
-import matplotlib.pyplot as plt
+import os, time
 from datetime import datetime
 from dotenv import load_dotenv
-from prompts import scope_config
-from keymetrics import process_key_metrics, generate_key_metrics
-from openai import OpenAI
+from prompt_builder import build_prompt, count_tokens
+from keymetrics import MetricsEngine, format_key_metrics
+from ingestion import load_work_items
+from project_state import ProjectState
+from llm_cache import ResponseCache, cached_completion
+from response_stream import ResponseSplitter, stream_completion
+from llm_clients import get_client_and_model, with_retries
+from llm_dispatch import Dispatcher
+from plot_pool import PlotPool, PlotError
+from charts import render_scope_charts
+from perf_trace import Trace, load_spans, latency_summary, trace_signature
 
 # === Load environment variables (comment here if running through streamlit web)===
 base_dir = os.path.dirname(os.path.abspath(__file__))
 env_path = os.path.join(base_dir, "..", "..", "..", "env.env")
 load_dotenv(dotenv_path=env_path)
 
-# === Model Configuration ===
-def get_client_and_model(provider):
-    if provider == "nvidia":
-        return OpenAI(base_url="https://integrate.api.nvidia.com/v1", api_key=os.getenv("NVIDIA_API_KEY")), "nvidia/llama-3.1-nemotron-ultra-253b-v1"
-    elif provider == "openai":
-        return OpenAI(api_key=os.getenv("OPENAI_API_KEY")), "gpt-3.5-turbo"
-    else:
-        raise ValueError("Unsupported provider")
+# === Plot Rendering (out of process, time-limited, cached per code and data) ===
+@st.cache_resource
+def get_plot_pool():
+    return PlotPool()
+
+def render_plot(code_snippet, df, data_fingerprint, container, trace):
+    try:
+        with trace.span("plot.render") as span:
+            png = get_plot_pool().render(code_snippet, df, data_fingerprint, info=span)
+            span["png_bytes"] = len(png)
+    except PlotError as exec_err:
+        container.warning(f"Error running generated plot code: {exec_err}")
+        return
+    container.image(png)
 
 st.set_page_config(page_title="AI Agent - Project Consultant", layout="wide")
 st.markdown("""
@@ -34,13 +47,46 @@ st.markdown("""
 
 st.title("🤖 AI Agent for Digital Project Analysis")
 
+# === Data Ingestion (parsed once per upload content, reused across reruns) ===
+@st.cache_resource(show_spinner="Parsing project data...", max_entries=8)
+def load_upload(file_id, _uploaded_file):
+    with Trace().span("ingest.load", file_bytes=_uploaded_file.size) as span:
+        data_digest, raw_df = load_work_items(_uploaded_file)
+        span["rows"] = len(raw_df)
+    return data_digest, raw_df
+
+@st.cache_resource(show_spinner="Comparing with the previous export...", max_entries=8)
+def load_export_update(project_key, data_digest, _raw_df):
+    with Trace().span("state.diff", rows=len(_raw_df)):
+        return ProjectState(project_key).apply_export(_raw_df, data_digest)
+
+@st.cache_resource(show_spinner="Computing key metrics...", max_entries=8)
+def load_metrics_engine(data_digest, _raw_df, _moments=None):
+    with Trace().span("metrics.engine", rows=len(_raw_df), incremental=_moments is not None):
+        engine = MetricsEngine(_raw_df, _moments)
+        engine.all_scopes()
+    return engine
+
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache()
+
+# Reparsing the trace file on every widget click is slow, so the summary is kept until the file changes
+@st.cache_data(max_entries=4)
+def load_latency_summary(signature):
+    return latency_summary(load_spans())
+
+# Shared by every session, so the latency histograms that drive routing and hedging build up across users
+@st.cache_resource
+def get_dispatcher():
+    return Dispatcher()
+
 # === File Upload ===
 uploaded_file = st.file_uploader("📁1st - Upload your project CSV file", type="csv")
 
 if uploaded_file:
-    sprint_col = None
     sprint_number = None
-    raw_df = pd.read_csv(uploaded_file)
+    data_digest, raw_df = load_upload(uploaded_file.file_id, uploaded_file)
 
     scope_options = {
         "Internal - Initial Planning Quality": "planning",
@@ -50,142 +96,171 @@ if uploaded_file:
     }
     selected_scope = st.selectbox("📌 2nd - What aspect of the project do you want to analyze?", list(scope_options.keys()))
     scope_key = scope_options[selected_scope]
-    focus = scope_config[scope_key]["prompt"]
-    instructions = scope_config[scope_key]["instructions"]
-    
-    if scope_key == "sprint_review":
-        sprint_col = next((col for col in raw_df.columns if "iteration path" in col.lower()), None)
-        if sprint_col:
-            raw_sprints = sorted(raw_df[sprint_col].dropna().unique())
-            sprint_map = {opt.split("\\")[-1]: opt for opt in raw_sprints}
-            selected_label = st.selectbox("📅 Select the Sprint you are reviewing (*required)", list(sprint_map.keys()))
-            sprint_number = sprint_map[selected_label]
-            df = raw_df[raw_df[sprint_col] == sprint_number]
-    elif scope_key == "planning":
-            df = raw_df.dropna(subset=["Created Date"])
     
-    df, total_items, total_story_points, total_closed_items, avg_story_points, avg_exec_time, max_exec_time, min_exec_time, exec_time_std, tasks_without_estimate, top_variability_contributor, top_variability_value, top_contributors, sprint_info_line = process_key_metrics(raw_df, scope_key, sprint_number)
-    
-    key_metrics_text = generate_key_metrics(
-        raw_df=raw_df,
-        df=df,
-        sprint_number=sprint_number,
-        total_items=total_items,
-        tasks_without_estimate=tasks_without_estimate,
-        avg_exec_time=avg_exec_time,
-        max_exec_time=max_exec_time,
-        min_exec_time=min_exec_time,
-        exec_time_std=exec_time_std,
-        total_closed_items=total_closed_items,
-        top_variability_contributor=top_variability_contributor,
-        top_variability_value=top_variability_value,
-        scope_key=scope_key
-    )
+    # Opt-in: exports are only compared with, and stored under, a project name the user chose
+    project_key = st.text_input("🗂️ Project name (optional; compares this export with the previous one of the same name)", value="",
+                                help="The export is stored under this name on the server, so a newer export only applies the work items that changed and the AI can be sent just the changes. Leave it empty to analyze this file on its own.").strip()
+    export_update = load_export_update(project_key, data_digest, raw_df) if project_key else None
+    delta = export_update.delta if export_update else None
+    changes_only = False
+    if delta and delta.has_previous:
+        with st.expander(f"🔄 What changed since the last export ({delta.inserted} new, {delta.updated} updated, {delta.removed} removed)", expanded=False):
+            st.markdown(delta.to_text())
+        changes_only = st.checkbox("Send only the changes since the last export to the AI (shorter prompt)", value=False)
+
+    # All scopes are served from the same cached engine, so switching scope or sprint does not recompute anything
+    engine = load_metrics_engine(data_digest, raw_df, export_update.moments if export_update else None)
+    all_sprints = False
+    if scope_key == "sprint_review" and engine.sprint_col:
+        sprint_map = {str(opt).split("\\")[-1]: opt for opt in engine.sprints}
+        all_sprints_label = "📚 All sprints"
+        selected_label = st.selectbox("📅 Select the Sprint you are reviewing (*required)", list(sprint_map.keys()) + [all_sprints_label])
+        all_sprints = selected_label == all_sprints_label
+        sprint_number = None if all_sprints else sprint_map[selected_label]
+
+    metrics = engine.scope(scope_key, sprint_number)
+    df = metrics.df
+    key_metrics_text = format_key_metrics(metrics, len(raw_df), scope_key, sprint_number)
+    sprint_trend = engine.sprint_trend() if all_sprints else None
+
+    if all_sprints:
+        st.markdown("### 📊 Cross-sprint Trend")
+        st.dataframe(sprint_trend.drop(columns=["Iteration Path"]), hide_index=True, use_container_width=True)
+        sprint_reviews = engine.sprint_reviews()
+        for sprint_label, sprint in sprint_map.items():
+            sprint_metrics = sprint_reviews[sprint]
+            with st.expander(f"Sprint review – {sprint_label}", expanded=False):
+                st.code(format_key_metrics(sprint_metrics, len(raw_df), "sprint_review", sprint).strip(), language='markdown')
+                st.markdown("\n".join(["Top contributors:"] + sprint_metrics.top_contributors))
 
     # === Provider Selection ===
     provider = st.radio(
-        "Choose LLM Provider", options=["openai", "nvidia"], index=1)
+        "Choose LLM Provider", options=["openai", "nvidia", "auto"] + (["mock"] if os.getenv("MOCK_LLM_BASE_URL") else []), index=1,
+        help="auto sends the prompt to the provider that is currently fastest for its size and hedges to another one when it is slow to answer")
+    stream_output = st.checkbox("⚡ Stream the analysis as it is generated", value=True)
+    builtin_charts = st.checkbox("📊 Use built-in charts (the AI writes no plot code, so the answer is shorter and faster)", value=True)
+    refresh_cache = st.checkbox("♻️ Ignore cached analysis and ask the model again", value=False)
 
     if st.button("🔍 Generate AI Analysis"):
-        if scope_key == "sprint_review" and not sprint_number:
+        if scope_key == "sprint_review" and not sprint_number and not all_sprints:
             st.warning("Please enter a Sprint Number before generating the Sprint Review analysis.")
             st.stop()
 
-        if scope_key == "sprint_review" and sprint_number:
-            focus += f"\nThis is Sprint {sprint_number}. Focus your analysis specifically on tasks completed during this sprint."
-
+        trace = Trace(provider=provider, scope=scope_key)
         with st.spinner("AI is thinking..."):
-            prompt = f"""
-                    ## {key_metrics_text.strip()}
-
-                    {focus}
-                    Also, take into account the Story Points scale used to estimate task effort.
-
-                    Project Data:
-                    - Total items: {total_items}
-                    - Total Story Points: {total_story_points}
-                    - Total Closed Items: {total_closed_items}
-                    - Average Story Points per item: {avg_story_points}
-                    - The Sprint information can be found in Iteration Path column in the data frame\n
-                    - The only Work Item Type that will receive Story Points is User Stories.
-                    - Maximum execution time for a single item: {max_exec_time} days
-                    - Minimum execution time for a single item: {min_exec_time} days
-                    - Standard deviation of execution time: {exec_time_std} days
-                    - Tasks without Story Point estimate: {tasks_without_estimate}
-                    - Contributor with highest time variability: {top_variability_contributor} ({top_variability_value} days)
-                    - Top contributors:\n  """ + "\n  ".join(top_contributors) + (f"""
-                    - Work items in Sprint {sprint_number}:\n
-                    """ + "\n  ".join([f"  - {row['Title']} (ID: {row['ID']})" for _, row in df.iterrows()]) if scope_key == "sprint_review" and sprint_number and 'Title' in df.columns and 'ID' in df.columns else "") + f"""
-
-                    Story Points Guide (Fibonacci Scale):
-                    - 1: Extra small – One-line change or similar work, can be done in 1 hour.
-                    - 2: Small – Developer understands the task, requires small problem-solving.
-                    - 3: Average – Developer knows what to do, no research required.
-                    - 5: Large – Task is not very common, may require help or some research.
-                    - 8: Extra Large – Time-consuming, needs research and possibly multiple developers.
-                    - 13: Warning – Complex, many unknowns, likely won't fit in one sprint.
-                    - 21: Hazard – Very complex, unclear how to start, many assumptions and unknowns.
-                    (Note: 21 is the upper limit of the story point scale used in this analysis.)
-
-                    Instructions:
-                    {instructions}
-                    """
+            with trace.span("prompt.build") as span:
+                built_prompt = build_prompt(key_metrics_text, metrics, scope_key, sprint_number, sprint_trend,
+                                            changes_text=delta.to_text() if changes_only else None, builtin_charts=builtin_charts)
+                span.update(prompt_tokens=built_prompt.tokens, listing=built_prompt.listing)
+            prompt = built_prompt.text
 
             try:
-                client, model = get_client_and_model(provider)
-                response = client.chat.completions.create(
-                    model=model,
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=0.4
-                )
-                analysis = response.choices[0].message.content.strip()
+                hedged_stream = None
+                if provider == "auto":
+                    # Nothing is sent until the stream is iterated, i.e. only on a cache miss
+                    hedged_stream = get_dispatcher().stream(prompt, built_prompt.tokens, 0.4)
+                    client, model = None, get_dispatcher().model_label()
+                else:
+                    client, model = get_client_and_model(provider)
+                response_cache = get_response_cache()
 
                 st.markdown("### 📌 Key Metrics")
                 st.code(key_metrics_text.strip(), language='markdown')
-                           
-                st.markdown("### 📈 Analysis Result")            
-                
-                if provider == "nvidia":
-                    think_match = re.search(r"<think>(.*?)</think>", analysis, re.DOTALL)
-                    reasoning = think_match.group(1).strip() if think_match else ""
-                    final_response = re.sub(r"<think>.*?</think>", "", analysis, flags=re.DOTALL).strip()
-                    with st.expander("🧠 AI Reasoning", expanded=False):
-                        st.markdown(reasoning)
-                else:
-                    reasoning = ""
-                    final_response = analysis
-                
-                # st.markdown(final_response)
-                
-                # # Extract and optionally run a matplotlib plot from the response
-                code_match = re.search(r"```python(.*?)```", final_response, re.DOTALL)
-                if code_match:
-                    code_snippet = code_match.group(1).strip()
-                    parts = re.split(r"```python.*?```", final_response, flags=re.DOTALL)
-                    reasoning_part = parts[0].strip() if parts else ""
-                    post_code_part = parts[1].strip() if len(parts) > 1 else ""
-                    try:
-                        env = {"df": df, "pd": pd, "plt": plt, "io": io}
-                        exec(code_snippet, {}, env)
-                        result_obj = env.get("result")
-                    except Exception as exec_err:
-                        result_obj = None
-                        st.warning(f"Error running generated plot code: {exec_err}")
-
-                    if reasoning_part:
-                        st.markdown(reasoning_part)
-                    if result_obj:
-                        if isinstance(result_obj, plt.Figure):
-                            st.pyplot(result_obj)
-                        elif hasattr(result_obj, 'figure') and isinstance(result_obj.figure, plt.Figure):
-                            st.pyplot(result_obj.figure)
-                        else:
-                            st.warning("⚠️ The code ran but did not return a valid matplotlib Figure. Make sure `result` is set to a plot object.")
-                    if post_code_part:
-                        st.markdown(post_code_part)
-                   
-                    st.markdown("---")
-                    st.code(code_snippet, language='python')
-                    
+                listing_note = "" if built_prompt.listing in ("full", "none", "changes") else f" · work items summarized ({built_prompt.listing})"
+                st.caption(f"🧮 Prompt size: {built_prompt.tokens:,} tokens (budget {built_prompt.budget:,}){listing_note}")
+
+                st.markdown("### 📈 Analysis Result")
+                cache_caption = st.empty()
+                reasoning_box = st.expander("🧠 AI Reasoning", expanded=False).empty()
+                before_code_box = st.empty()
+                plot_box = st.empty()
+                after_code_box = st.empty()
+                code_box = st.empty()
+
+                if builtin_charts:
+                    # Drawn from the engine's aggregates, so they are shown before the model answers
+                    with trace.span("charts.render") as span:
+                        charts = render_scope_charts(engine, scope_key, sprint_number, data_digest)
+                        span.update(charts=len(charts), png_bytes=sum(len(png) for _, png in charts))
+                    with plot_box.container():
+                        columns = st.columns(2)
+                        for index, (_, png) in enumerate(charts):
+                            columns[index % 2].image(png)
+
+                # === Live rendering: each event from the splitter updates its own placeholder ===
+                splitter = ResponseSplitter()
+
+                def render(events):
+                    for kind, _ in events:
+                        if kind == "reasoning":
+                            reasoning_box.markdown(splitter.reasoning_text)
+                        elif kind == "prose":
+                            target = before_code_box if len(splitter.sections) == 1 else after_code_box
+                            target.markdown("".join(splitter.sections[-1]).strip())
+                        elif kind == "code" and not splitter.code_blocks:
+                            code_box.code(splitter.partial_code, language='python')
+                        elif kind == "code_done" and len(splitter.code_blocks) == 1:
+                            # The plot runs as soon as the first code fence closes, while the rest of the report streams in
+                            code_box.code(splitter.code_snippet, language='python')
+                            if not builtin_charts:
+                                render_plot(splitter.code_snippet, df, f"{data_digest}:{scope_key}:{sprint_number}", plot_box, trace)
+
+                request_started = time.perf_counter()
+
+                def complete():
+                    if hedged_stream is not None:
+                        deltas = hedged_stream
+                    elif stream_output:
+                        deltas = stream_completion(client, model, prompt, 0.4)
+                    else:
+                        response = with_retries(lambda: client.chat.completions.create(
+                            model=model,
+                            messages=[{"role": "user", "content": prompt}],
+                            temperature=0.4
+                        ))
+                        trace.record("model.ttft", (time.perf_counter() - request_started) * 1000, streamed=False)
+                        return response.choices[0].message.content.strip()
+                    tokens = []
+                    for token in deltas:
+                        if not tokens:
+                            trace.record("model.ttft", (time.perf_counter() - request_started) * 1000, streamed=True)
+                        tokens.append(token)
+                        if stream_output:
+                            render(splitter.feed(token))
+                    return "".join(tokens).strip()
+
+                with trace.span("model.total", model=model, prompt_tokens=built_prompt.tokens) as span:
+                    analysis, cache_hit = cached_completion(response_cache, provider, model, prompt, 0.4, complete, refresh=refresh_cache)
+                    span.update(cache_hit=cache_hit, completion_tokens=count_tokens(analysis), response_bytes=len(analysis.encode("utf-8")))
+                    if hedged_stream is not None and hedged_stream.provider:
+                        span.update(winner=hedged_stream.provider, hedged=hedged_stream.hedged)
+                if cache_hit or not stream_output:
+                    render(splitter.feed(analysis))
+                render(splitter.close())
+                st.session_state["last_trace"] = trace.spans
+
+                cache_stats = response_cache.stats()
+                answered_by = f" from {hedged_stream.provider}{' (hedged)' if hedged_stream.hedged else ''}" if hedged_stream and hedged_stream.provider else ""
+                cache_caption.caption(f"{'⚡ Served from cache' if cache_hit else '🆕 Fresh model response' + answered_by} · "
+                                      f"cache hits: {cache_stats['hits']} · misses: {cache_stats['misses']}")
+                if not splitter.reasoning_text:
+                    reasoning_box.markdown("_No reasoning was returned by this model._")
+
             except Exception as e:
                 st.error(f"Model consultation error: {e}")
+
+# === Performance Panel ===
+with st.expander("⏱️ Performance", expanded=False):
+    if st.session_state.get("last_trace"):
+        st.markdown("**Last analysis**")
+        st.dataframe(pd.DataFrame(st.session_state["last_trace"]).drop(columns=["ts", "run_id"]), hide_index=True, use_container_width=True)
+    summary = load_latency_summary(trace_signature())
+    if summary.empty:
+        st.caption("No runs recorded yet.")
+    else:
+        st.markdown("**p50 / p95 per stage over recent runs**")
+        st.dataframe(summary, hide_index=True, use_container_width=True)
+    routing = get_dispatcher().latency_table()
+    if routing:
+        st.markdown("**Time to first token seen by the auto dispatcher**")
+        st.dataframe(pd.DataFrame(routing), hide_index=True, use_container_width=True)
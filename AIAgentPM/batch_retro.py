@@ -0,0 +1,235 @@
+import argparse, asyncio, json, os, re, sys, threading, time
+from dotenv import load_dotenv
+from ingestion import load_work_items
+from keymetrics import SCOPES, MetricsEngine, format_key_metrics
+from prompt_builder import build_prompt
+from llm_cache import ResponseCache, cache_key
+from llm_clients import PROVIDERS, get_client_and_model, with_retries
+from llm_dispatch import Dispatcher
+from response_stream import split_response
+from plot_pool import PlotPool, PlotError
+from charts import render_scope_charts
+from perf_trace import Trace
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+load_dotenv(dotenv_path=os.path.join(base_dir, "..", "..", "..", "env.env"))
+
+TEMPERATURE = 0.4
+DEFAULT_RATE_LIMITS = {"nvidia": 30, "openai": 60, "mock": 600}  # requests per minute
+
+
+class RateLimiter:
+    """Spaces out requests to one provider so that no more than `per_minute` start in any minute.
+
+    `wait` is awaited by jobs that call the provider directly; the auto dispatcher calls `wait_blocking` from
+    the thread of each request it launches, so primary and hedged requests count against their own provider.
+    """
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        return delay
+
+    async def wait(self):
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def wait_blocking(self):
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _rate_limiter(provider, args):
+    return RateLimiter(args.rate_limit if args.rate_limit is not None else DEFAULT_RATE_LIMITS.get(provider, 60))
+
+
+class Job:
+    def __init__(self, csv_path, data_digest, engine, raw_total, scope_key, sprint_number=None):
+        self.csv_path = csv_path
+        self.data_digest = data_digest
+        self.engine = engine
+        self.raw_total = raw_total
+        self.scope_key = scope_key
+        self.sprint_number = sprint_number
+
+    @property
+    def job_id(self):
+        name = os.path.splitext(os.path.basename(self.csv_path))[0]
+        parts = [name, self.scope_key]
+        if self.sprint_number:
+            parts.append(str(self.sprint_number).split("\\")[-1])
+        return "/".join(re.sub(r"[^\w.-]+", "_", part) for part in parts)
+
+
+def plan_jobs(input_dir, scopes, sprint_filter=None):
+    jobs = []
+    for name in sorted(os.listdir(input_dir)):
+        if not name.lower().endswith(".csv"):
+            continue
+        csv_path = os.path.join(input_dir, name)
+        data_digest, raw_df = load_work_items(csv_path)
+        engine = MetricsEngine(raw_df)
+        for scope_key in scopes:
+            if scope_key != "sprint_review":
+                jobs.append(Job(csv_path, data_digest, engine, len(raw_df), scope_key))
+                continue
+            if not engine.sprint_col:
+                print(f"Skipping sprint_review for {name}: no Iteration Path column", file=sys.stderr)
+                continue
+            for sprint in engine.sprints:
+                label = str(sprint).split("\\")[-1]
+                if sprint_filter and label not in sprint_filter and sprint not in sprint_filter:
+                    continue
+                jobs.append(Job(csv_path, data_digest, engine, len(raw_df), scope_key, sprint))
+    return jobs
+
+
+def _clear_outputs(job_dir):
+    # A rerun may use the other plot mode, so files of the previous run must not linger; sprint subdirectories stay
+    for name in os.listdir(job_dir):
+        path = os.path.join(job_dir, name)
+        if os.path.isfile(path):
+            os.remove(path)
+
+
+def _write(path, content, mode="w"):
+    with open(path, mode, **({} if "b" in mode else {"encoding": "utf-8"})) as fh:
+        fh.write(content)
+
+
+async def run_job(job, args, cache, semaphore, limiter, plot_pool, dispatcher=None):
+    job_dir = os.path.join(args.output_dir, job.job_id)
+    marker = os.path.join(job_dir, "done.json")
+    if os.path.exists(marker) and not args.refresh:
+        return "skipped"
+
+    trace = Trace(provider=args.provider, scope=job.scope_key, job=job.job_id)
+    with trace.span("metrics.scope"):
+        metrics = job.engine.scope(job.scope_key, job.sprint_number)
+    key_metrics_text = format_key_metrics(metrics, job.raw_total, job.scope_key, job.sprint_number)
+    with trace.span("prompt.build") as span:
+        built_prompt = build_prompt(key_metrics_text, metrics, job.scope_key, job.sprint_number, budget=args.token_budget,
+                                    builtin_charts=args.builtin_charts)
+        span.update(prompt_tokens=built_prompt.tokens, listing=built_prompt.listing)
+    prompt = built_prompt.text
+    if args.provider == "auto":
+        client, model = None, dispatcher.model_label()
+    else:
+        client, model = get_client_and_model(args.provider)
+
+    def complete():
+        if args.provider == "auto":
+            return "".join(dispatcher.stream(prompt, built_prompt.tokens, TEMPERATURE)).strip()
+        response = with_retries(lambda: client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=TEMPERATURE
+        ))
+        return response.choices[0].message.content.strip()
+
+    key = cache_key(prompt, args.provider, model, TEMPERATURE)
+    async with semaphore:
+        started = time.monotonic()
+        analysis = None if args.refresh else await asyncio.to_thread(cache.get, key)
+        cache_hit = analysis is not None
+        if not cache_hit:
+            # Only real model calls count against the provider's rate limit; the dispatcher applies its own per request
+            if limiter is not None:
+                await limiter.wait()
+            analysis = await asyncio.to_thread(complete)
+            await asyncio.to_thread(cache.put, key, args.provider, model, TEMPERATURE, analysis)
+        elapsed = time.monotonic() - started
+    trace.record("model.total", elapsed * 1000, model=model, prompt_tokens=built_prompt.tokens, cache_hit=cache_hit,
+                 response_bytes=len(analysis.encode("utf-8")))
+
+    os.makedirs(job_dir, exist_ok=True)
+    _clear_outputs(job_dir)
+    splitter = split_response(analysis)
+    report = "\n\n".join(part for part in (splitter.before_code, splitter.after_code) if part)
+    _write(os.path.join(job_dir, "key_metrics.md"), key_metrics_text.strip() + "\n")
+    _write(os.path.join(job_dir, "report.md"), report + "\n")
+    if splitter.reasoning_text:
+        _write(os.path.join(job_dir, "reasoning.md"), splitter.reasoning_text + "\n")
+
+    plot_error = None
+    if args.builtin_charts:
+        with trace.span("charts.render") as span:
+            charts = await asyncio.to_thread(render_scope_charts, job.engine, job.scope_key, job.sprint_number, job.data_digest)
+            span["charts"] = len(charts)
+        for name, png in charts:
+            _write(os.path.join(job_dir, f"chart_{name}.png"), png, "wb")
+    elif splitter.code_snippet:
+        _write(os.path.join(job_dir, "plot.py"), splitter.code_snippet + "\n")
+        fingerprint = f"{job.data_digest}:{job.scope_key}:{job.sprint_number}"
+        try:
+            with trace.span("plot.render") as span:
+                png = await asyncio.to_thread(plot_pool.render, splitter.code_snippet, metrics.df, fingerprint, "png", span)
+                span["png_bytes"] = len(png)
+            _write(os.path.join(job_dir, "plot.png"), png, "wb")
+        except PlotError as exec_err:
+            plot_error = str(exec_err)
+
+    # The marker is written last, so an interrupted job is redone on the next run
+    _write(marker, json.dumps({
+        "csv": job.csv_path, "scope": job.scope_key, "sprint": job.sprint_number, "provider": args.provider,
+        "model": model, "prompt_tokens": built_prompt.tokens, "cache_hit": cache_hit, "seconds": round(elapsed, 2), "plot_error": plot_error,
+    }, indent=2, default=str))
+    return "cached" if cache_hit else "done"
+
+
+async def run_batch(args):
+    jobs = plan_jobs(args.input_dir, args.scopes, set(args.sprints or []))
+    cache = ResponseCache()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    limiter, dispatcher = None, None
+    if args.provider == "auto":
+        dispatcher = Dispatcher(rate_limits={provider: _rate_limiter(provider, args).wait_blocking for provider in PROVIDERS})
+    else:
+        limiter = _rate_limiter(args.provider, args)
+    plot_pool = PlotPool()
+
+    async def guarded(job):
+        try:
+            status = await run_job(job, args, cache, semaphore, limiter, plot_pool, dispatcher)
+        except Exception as e:
+            status = f"failed: {e}"
+        print(f"[{status}] {job.job_id}")
+        return status
+
+    try:
+        statuses = await asyncio.gather(*(guarded(job) for job in jobs))
+    finally:
+        plot_pool.close()
+    failed = sum(1 for status in statuses if status.startswith("failed"))
+    print(f"{len(jobs)} jobs: {statuses.count('done')} generated, {statuses.count('cached')} from cache, "
+          f"{statuses.count('skipped')} already completed, {failed} failed")
+    return 1 if failed else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate AI retrospectives for every CSV export in a directory.")
+    parser.add_argument("input_dir", help="Directory containing Azure DevOps CSV exports")
+    parser.add_argument("--output-dir", default="retro_reports")
+    parser.add_argument("--scopes", nargs="+", choices=SCOPES, default=list(SCOPES))
+    parser.add_argument("--sprints", nargs="+", help="Only review these sprints (Iteration Path or its last segment)")
+    parser.add_argument("--provider", choices=list(PROVIDERS) + ["auto"], default="nvidia",
+                        help="auto routes each job to the fastest configured provider and hedges slow requests")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum number of model calls in flight")
+    parser.add_argument("--rate-limit", type=float, default=None, help="Requests per minute to each provider (default depends on provider)")
+    parser.add_argument("--token-budget", type=int, default=None, help="Maximum prompt tokens (default: AIAGENT_PROMPT_TOKEN_BUDGET or 6000)")
+    parser.add_argument("--builtin-charts", action="store_true", help="Render the built-in charts instead of asking the model for plot code")
+    parser.add_argument("--refresh", action="store_true", help="Ignore completed jobs and cached responses")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run_batch(parse_args())))
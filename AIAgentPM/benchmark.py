@@ -0,0 +1,221 @@
+import argparse, io, json, os, platform, statistics, subprocess, sys, time
+from datetime import datetime
+import pandas as pd
+from ingestion import parse_work_items, content_digest
+from keymetrics import SCOPES, MetricsEngine, process_key_metrics, generate_key_metrics, format_key_metrics
+from prompt_builder import build_prompt
+from prompts import scope_config
+from synthetic_data import generate_work_items
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(base_dir, "bench_results")
+
+
+def _timed(call, repeat):
+    """Run `call` `repeat` times after one warm-up run; returns duration statistics in milliseconds."""
+    call()
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        durations.append((time.perf_counter() - started) * 1000)
+    return {
+        "repeat": repeat,
+        "min_ms": round(min(durations), 3),
+        "median_ms": round(statistics.median(durations), 3),
+        "mean_ms": round(statistics.fmean(durations), 3),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=base_dir, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# === Benchmarks ===
+def bench_ingestion(data, repeat):
+    return [{"name": "parse_work_items", **_timed(lambda: parse_work_items(data), repeat)}]
+
+
+def bench_key_metrics(raw_df, sprint, repeat):
+    results = []
+    for scope_key in SCOPES:
+        sprint_number = sprint if scope_key == "sprint_review" else None
+        results.append({"name": "process_key_metrics", "scope": scope_key,
+                        **_timed(lambda: process_key_metrics(raw_df, scope_key, sprint_number), repeat)})
+        metrics = MetricsEngine(raw_df).scope(scope_key, sprint_number)
+        results.append({"name": "generate_key_metrics", "scope": scope_key, **_timed(lambda: generate_key_metrics(
+            raw_df=raw_df,
+            df=None,
+            sprint_number=sprint_number,
+            total_items=metrics.total_items,
+            total_closed_items=metrics.total_closed_items,
+            tasks_without_estimate=metrics.tasks_without_estimate,
+            avg_exec_time=metrics.avg_exec_time,
+            max_exec_time=metrics.max_exec_time,
+            min_exec_time=metrics.min_exec_time,
+            exec_time_std=metrics.exec_time_std,
+            top_variability_contributor=metrics.top_variability_contributor,
+            top_variability_value=metrics.top_variability_value,
+            scope_key=scope_key,
+        ), repeat)})
+    return results
+
+
+def bench_engine(args, repeat):
+    """Cold MetricsEngine build with every scope, i.e. the metrics cost of a new upload, on `--engine-rows` work items."""
+    raw = generate_work_items(args.engine_rows, sprints=args.sprints, assignees=args.assignees, missing_points=args.missing_points,
+                              missing_assignee=args.missing_assignee, missing_dates=args.missing_dates, seed=args.seed)
+    raw_df = parse_work_items(raw.to_csv(index=False).encode("utf-8"))
+    return [{"name": "metrics_engine", "rows": len(raw_df), **_timed(lambda: MetricsEngine(raw_df).all_scopes(), repeat)}]
+
+
+def bench_prompts(raw_df, sprint, repeat):
+    engine = MetricsEngine(raw_df)
+    results = []
+    for scope_key in scope_config:
+        sprint_number = sprint if scope_key == "sprint_review" else None
+        metrics = engine.scope(scope_key, sprint_number)
+        metrics.df  # The work item listing of sprint reviews is read from the materialized frame
+        key_metrics_text = format_key_metrics(metrics, len(raw_df), scope_key, sprint_number)
+        built = build_prompt(key_metrics_text, metrics, scope_key, sprint_number)
+        results.append({"name": "build_prompt", "scope": scope_key, "prompt_tokens": built.tokens, "listing": built.listing,
+                        **_timed(lambda: build_prompt(key_metrics_text, metrics, scope_key, sprint_number), repeat)})
+    return results
+
+
+def bench_end_to_end(data, sprint, repeat, latency, token_delay):
+    """Ingestion, metrics, prompt and a streamed completion against the local mock endpoint, per scope."""
+    from mock_llm_server import start_mock_server
+    from llm_clients import PROVIDERS, get_client_and_model, close_clients
+    from response_stream import ResponseSplitter, stream_completion
+
+    server, base_url = start_mock_server(latency=latency, token_delay=token_delay)
+    previous_url = os.environ.get(PROVIDERS["mock"]["base_url_env"])
+    os.environ[PROVIDERS["mock"]["base_url_env"]] = base_url
+    close_clients()
+    client, model = get_client_and_model("mock")
+    results = []
+    try:
+        for scope_key in SCOPES:
+            sprint_number = sprint if scope_key == "sprint_review" else None
+            ttfts = []
+
+            def run():
+                started = time.perf_counter()
+                raw_df = parse_work_items(data)
+                metrics = MetricsEngine(raw_df).scope(scope_key, sprint_number)
+                key_metrics_text = format_key_metrics(metrics, len(raw_df), scope_key, sprint_number)
+                prompt = build_prompt(key_metrics_text, metrics, scope_key, sprint_number).text
+                splitter = ResponseSplitter()
+                first_token_ms = None
+                for token in stream_completion(client, model, prompt, 0.4):
+                    if first_token_ms is None:
+                        first_token_ms = (time.perf_counter() - started) * 1000
+                    splitter.feed(token)
+                splitter.close()
+                ttfts.append(first_token_ms)
+
+            stats = _timed(run, repeat)
+            # The first entry belongs to the warm-up run
+            results.append({"name": "end_to_end", "scope": scope_key, "mock_latency_s": latency, "mock_token_delay_s": token_delay,
+                            "first_token_median_ms": round(statistics.median(ttfts[1:]), 3), **stats})
+    finally:
+        server.shutdown()
+        close_clients()
+        if previous_url is None:
+            os.environ.pop(PROVIDERS["mock"]["base_url_env"], None)
+        else:
+            os.environ[PROVIDERS["mock"]["base_url_env"]] = previous_url
+    return results
+
+
+# === Runner ===
+def run_benchmarks(args):
+    raw = generate_work_items(args.rows, sprints=args.sprints, assignees=args.assignees, missing_points=args.missing_points,
+                              missing_assignee=args.missing_assignee, missing_dates=args.missing_dates, seed=args.seed)
+    buffer = io.StringIO()
+    raw.to_csv(buffer, index=False)
+    data = buffer.getvalue().encode("utf-8")
+    raw_df = parse_work_items(data)
+    sprints = MetricsEngine(raw_df).sprints
+    sprint = sprints[len(sprints) // 2] if sprints else None
+
+    results = []
+    if "ingest" in args.suites:
+        results += bench_ingestion(data, args.repeat)
+    if "metrics" in args.suites:
+        results += bench_key_metrics(raw_df, sprint, args.repeat)
+    if "engine" in args.suites:
+        results += bench_engine(args, args.repeat)
+    if "prompts" in args.suites:
+        results += bench_prompts(raw_df, sprint, args.repeat)
+    if "e2e" in args.suites:
+        results += bench_end_to_end(data, sprint, args.repeat, args.mock_latency, args.mock_token_delay)
+
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "dataset": {"rows": args.rows, "sprints": args.sprints, "assignees": args.assignees, "missing_points": args.missing_points,
+                    "missing_assignee": args.missing_assignee, "missing_dates": args.missing_dates, "seed": args.seed,
+                    "csv_bytes": len(data), "digest": content_digest(data)},
+        "results": results,
+    }
+
+
+def _result_key(result):
+    return result["name"], result.get("scope")
+
+
+def compare(previous, current):
+    """Median change per benchmark between two result files, as printable lines."""
+    before = {_result_key(result): result for result in previous["results"]}
+    lines = []
+    for result in current["results"]:
+        old = before.get(_result_key(result))
+        label = " / ".join(part for part in _result_key(result) if part)
+        if old is None:
+            lines.append(f"{label}: {result['median_ms']:.1f} ms (new)")
+            continue
+        change = (result["median_ms"] - old["median_ms"]) / old["median_ms"] * 100 if old["median_ms"] else 0.0
+        lines.append(f"{label}: {old['median_ms']:.1f} → {result['median_ms']:.1f} ms ({change:+.1f}%)")
+    return lines
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ingestion, key metrics, prompt construction and a mocked end-to-end run.")
+    parser.add_argument("--rows", type=int, default=10_000, help="Synthetic work items (1k to 5M)")
+    parser.add_argument("--sprints", type=int, default=12)
+    parser.add_argument("--assignees", type=int, default=8)
+    parser.add_argument("--missing-points", type=float, default=0.1)
+    parser.add_argument("--missing-assignee", type=float, default=0.05)
+    parser.add_argument("--missing-dates", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark, after one warm-up run")
+    parser.add_argument("--suites", nargs="+", choices=["ingest", "metrics", "engine", "prompts", "e2e"], default=["ingest", "metrics", "engine", "prompts", "e2e"])
+    parser.add_argument("--engine-rows", type=int, default=1_000_000, help="Work items of the metrics engine benchmark, which targets large exports")
+    parser.add_argument("--mock-latency", type=float, default=0.2, help="Seconds before the mock endpoint's first token")
+    parser.add_argument("--mock-token-delay", type=float, default=0.0, help="Seconds between the mock endpoint's streamed tokens")
+    parser.add_argument("--output", default=None, help=f"Result file (default: {RESULTS_DIR}/<timestamp>-<rows>.json)")
+    parser.add_argument("--compare", default=None, help="Earlier result file to compare medians with")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = run_benchmarks(args)
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{args.rows}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2, default=str)
+    for result in report["results"]:
+        print(f"{result['name']:<22} {result.get('scope') or '':<14} median {result['median_ms']:>10.1f} ms   min {result['min_ms']:>10.1f} ms")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            print("\n".join(["", f"Compared with {args.compare}:"] + compare(json.load(fh), report)))
+    print(f"Results written to {output}", file=sys.stderr)
@@ -0,0 +1,139 @@
+import io, threading
+from collections import OrderedDict
+import numpy as np
+from matplotlib.figure import Figure
+from keymetrics import combine_moments, scope_moments
+
+# === Built-in charts, drawn from the metrics engine's aggregates instead of model-generated code ===
+FIGSIZE = (6, 4)
+CHART_CACHE_ENTRIES = 128
+
+_figures = OrderedDict()
+_lock = threading.Lock()
+
+
+def _sprint_label(path):
+    return str(path).split("\\")[-1]
+
+
+def user_stories_per_sprint(engine, scope_key, sprint_number):
+    counts = engine.type_counts()
+    if counts.empty:
+        return None
+    stories = counts["User Story"] if "User Story" in counts.columns else counts.sum(axis=1)
+    fig = Figure(figsize=FIGSIZE)
+    ax = fig.subplots()
+    colors = ["tab:orange" if sprint == sprint_number else "tab:blue" for sprint in stories.index]
+    ax.bar([_sprint_label(sprint) for sprint in stories.index], stories.values, color=colors)
+    ax.set_ylabel("User Stories")
+    ax.set_title("User Stories per Sprint")
+    ax.tick_params(axis="x", labelrotation=45)
+    return fig
+
+
+def cycle_time_by_assignee(engine, scope_key, sprint_number):
+    by_assignee = engine.scope(scope_key, sprint_number).by_assignee
+    by_assignee = by_assignee[by_assignee["et_n"] > 0].sort_values("et_mean")
+    if by_assignee.empty:
+        return None
+    positions = np.arange(len(by_assignee))
+    fig = Figure(figsize=FIGSIZE)
+    ax = fig.subplots()
+    # Min-max range as a wide gray line, mean ± one standard deviation as an error bar
+    ax.hlines(positions, by_assignee["et_min"], by_assignee["et_max"], color="lightgray", linewidth=6, label="min–max")
+    ax.errorbar(by_assignee["et_mean"], positions, xerr=by_assignee["et_std"].fillna(0.0), fmt="o", color="tab:blue", capsize=4, label="mean ± std")
+    ax.set_yticks(positions, [str(name) for name in by_assignee.index])
+    ax.set_xlabel("Cycle time (days)")
+    ax.set_title("Cycle Time per Assignee")
+    ax.legend(loc="lower right", fontsize="small")
+    return fig
+
+
+def points_per_sprint(engine, scope_key, sprint_number):
+    trend = engine.sprint_trend()
+    if trend.empty:
+        return None
+    positions = np.arange(len(trend))
+    fig = Figure(figsize=FIGSIZE)
+    ax = fig.subplots()
+    ax.bar(positions - 0.2, trend["Planned Story Points"], width=0.4, label="Planned", color="tab:gray")
+    ax.bar(positions + 0.2, trend["Velocity (closed points)"], width=0.4, label="Closed", color="tab:green")
+    if sprint_number is not None:
+        selected = np.flatnonzero(trend["Iteration Path"].values == str(sprint_number))
+        for position in selected:
+            ax.axvspan(position - 0.5, position + 0.5, color="tab:orange", alpha=0.15)
+    ax.set_xticks(positions, trend["Sprint"], rotation=45)
+    ax.set_ylabel("Story Points")
+    ax.set_title("Planned vs. Closed Story Points per Sprint")
+    ax.legend(fontsize="small")
+    return fig
+
+
+def estimate_coverage(engine, scope_key, sprint_number):
+    if not engine.sprint_col:
+        return None
+    moments = scope_moments(engine.moments, scope_key, None, engine.sprint_col)
+    cells = combine_moments(moments, by=[engine.sprint_col, "Assigned To"])
+    if cells.empty:
+        return None
+    cells["Assigned To"] = cells["Assigned To"].astype(object).fillna("Unassigned")
+    cells["coverage"] = cells["sp_n"] / cells["rows"]
+    grid = cells.pivot_table(index=engine.sprint_col, columns="Assigned To", values="coverage", aggfunc="sum", observed=True)
+    grid.index = grid.index.astype(object)
+    grid = grid.reindex([sprint for sprint in engine.sprints if sprint in grid.index])
+    fig = Figure(figsize=FIGSIZE)
+    ax = fig.subplots()
+    image = ax.imshow(grid.values.astype("float64"), aspect="auto", cmap="RdYlGn", vmin=0, vmax=1)
+    ax.set_yticks(np.arange(len(grid.index)), [_sprint_label(sprint) for sprint in grid.index])
+    ax.set_xticks(np.arange(len(grid.columns)), [str(name) for name in grid.columns], rotation=45, ha="right")
+    fig.colorbar(image, ax=ax, label="Share of items with Story Points")
+    ax.set_title("Estimate Coverage per Sprint and Assignee")
+    return fig
+
+
+CHARTS = {
+    "user_stories_per_sprint": user_stories_per_sprint,
+    "cycle_time_by_assignee": cycle_time_by_assignee,
+    "points_per_sprint": points_per_sprint,
+    "estimate_coverage": estimate_coverage,
+}
+
+# Planning has no execution times, so it gets no cycle-time chart
+SCOPE_CHARTS = {
+    "planning": ["user_stories_per_sprint", "estimate_coverage"],
+    "execution": ["points_per_sprint", "cycle_time_by_assignee"],
+    "sprint_review": ["points_per_sprint", "cycle_time_by_assignee"],
+    "delivery": ["points_per_sprint", "cycle_time_by_assignee", "user_stories_per_sprint", "estimate_coverage"],
+}
+
+
+def render_chart(name, engine, scope_key, sprint_number, fingerprint, fmt="png"):
+    """PNG or SVG bytes of one built-in chart, or None when the data has nothing to show; cached per data fingerprint."""
+    key = (fingerprint, name, scope_key, str(sprint_number), fmt)
+    with _lock:
+        if key in _figures:
+            _figures.move_to_end(key)
+            return _figures[key]
+    # Figures are created without pyplot, so concurrent Streamlit sessions do not share matplotlib state
+    fig = CHARTS[name](engine, scope_key, sprint_number)
+    payload = None
+    if fig is not None:
+        fig.tight_layout()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=fmt)
+        payload = buffer.getvalue()
+    with _lock:
+        _figures[key] = payload
+        while len(_figures) > CHART_CACHE_ENTRIES:
+            _figures.popitem(last=False)
+    return payload
+
+
+def render_scope_charts(engine, scope_key, sprint_number, fingerprint, fmt="png"):
+    """[(name, bytes)] of the built-in charts of a scope, skipping charts without data."""
+    charts = []
+    for name in SCOPE_CHARTS[scope_key]:
+        payload = render_chart(name, engine, scope_key, sprint_number, fingerprint, fmt)
+        if payload is not None:
+            charts.append((name, payload))
+    return charts
@@ -0,0 +1,128 @@
+import os, io, hashlib
+from collections import OrderedDict
+import pandas as pd
+
+# === Cache Configuration ===
+base_dir = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.getenv("AIAGENT_INGEST_CACHE_DIR", os.path.join(base_dir, ".cache", "ingest"))
+CACHE_MAX_BYTES = int(float(os.getenv("AIAGENT_INGEST_CACHE_MB", "512")) * 1024 * 1024)
+MEMORY_ENTRIES = 4
+
+DATE_COLUMNS = ["Created Date", "Activated Date", "Closed Date", "Target Date", "Changed Date"]
+CATEGORY_COLUMNS = ["Assigned To", "Iteration Path", "Work Item Type"]
+NUMERIC_COLUMNS = ["Story Points"]
+# Arrow-backed, so missing titles are a validity bitmap instead of a per-row check of Python objects
+STRING_COLUMNS = ["Title"]
+# Bump when parse_work_items changes what it produces; the column lists above are part of the key already
+PARSER_VERSION = 1
+SCHEMA_KEY = hashlib.sha256(repr((PARSER_VERSION, DATE_COLUMNS, CATEGORY_COLUMNS, NUMERIC_COLUMNS, STRING_COLUMNS)).encode("utf-8")).hexdigest()[:12]
+
+_memory = OrderedDict()
+
+
+def content_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _read_bytes(source):
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as fh:
+            return fh.read()
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    data = source.read()
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return data
+
+
+def parse_work_items(data):
+    """Parse a raw Azure DevOps CSV export into the typed frame used by keymetrics."""
+    df = pd.read_csv(io.BytesIO(data), dtype={col: "string[pyarrow]" for col in STRING_COLUMNS})
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
+
+
+# === On-disk Parquet cache (LRU by access time, bounded by total size) ===
+def _cache_path(digest):
+    # Frames typed by another parser version are never served; they age out through evict_cache
+    return os.path.join(CACHE_DIR, f"{digest}-{SCHEMA_KEY}.parquet")
+
+
+def _read_cached(digest):
+    path = _cache_path(digest)
+    if not os.path.exists(path):
+        return None
+    try:
+        df = pd.read_parquet(path)
+    except Exception:
+        return None
+    os.utime(path, None)
+    return df
+
+
+def _write_cached(digest, df):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _cache_path(digest)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    except Exception:
+        # Columns with mixed object types cannot always be written to Parquet; keep the in-memory copy only
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return
+    evict_cache(CACHE_MAX_BYTES)
+
+
+def evict_cache(max_bytes=CACHE_MAX_BYTES):
+    if not os.path.isdir(CACHE_DIR):
+        return
+    entries = []
+    for name in os.listdir(CACHE_DIR):
+        if not name.endswith(".parquet"):
+            continue
+        path = os.path.join(CACHE_DIR, name)
+        stat = os.stat(path)
+        entries.append((stat.st_mtime, stat.st_size, path))
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        os.remove(path)
+        total -= size
+
+
+def load_work_items(source):
+    """Return (digest, typed DataFrame) for an uploaded file, path or raw bytes.
+
+    The frame is shared between reruns and sessions with the same content, so callers must treat it as read-only.
+    """
+    data = _read_bytes(source)
+    digest = content_digest(data)
+
+    if digest in _memory:
+        _memory.move_to_end(digest)
+        return digest, _memory[digest]
+
+    df = _read_cached(digest)
+    if df is None:
+        df = parse_work_items(data)
+        _write_cached(digest, df)
+
+    _memory[digest] = df
+    while len(_memory) > MEMORY_ENTRIES:
+        _memory.popitem(last=False)
+    return digest, df
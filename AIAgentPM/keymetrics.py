@@ -1,62 +1,531 @@
+import math, re
+from dataclasses import dataclass, field
+from functools import cached_property
+import numpy as np
 import pandas as pd
 
-def process_key_metrics(raw_df, scope_key, sprint_number):
+SCOPES = ("planning", "execution", "sprint_review", "delivery")
+EXEC_TIME_COL = 'Execution Time (days)'
+HAS_CREATED_COL = 'Has Created Date'
+MOMENT_COLUMNS = ["rows", "items", "sp_sum", "sp_n", "closed", "closed_sp", "et_n", "et_mean", "et_m2", "et_min", "et_max"]
 
-    df = raw_df.copy()
-    df['Activated Date'] = pd.to_datetime(df.get('Activated Date'), errors='coerce')
-    df['Created Date'] = pd.to_datetime(df.get('Created Date'), errors='coerce')
-    df['Closed Date'] = pd.to_datetime(df.get('Closed Date'), errors='coerce')
 
-    if scope_key == "planning":
-        df = df.dropna(subset=["Created Date"])
-        df['Execution Time (days)'] = pd.NA  # não calcula tempo
-    elif scope_key == "sprint_review" and sprint_number:
-        sprint_col = next((col for col in df.columns if "iteration path" in col.lower()), None)
-        if sprint_col:
-            df = df[df[sprint_col] == sprint_number]
-        df['Execution Time (days)'] = (df['Closed Date'] - df['Activated Date']).dt.days
+@dataclass
+class KeyMetrics:
+    total_items: int
+    total_story_points: float
+    total_closed_items: int
+    avg_story_points: float
+    avg_exec_time: object
+    max_exec_time: object
+    min_exec_time: object
+    exec_time_std: object
+    tasks_without_estimate: int
+    top_variability_contributor: object
+    top_variability_value: float
+    top_contributors: list
+    sprint_info_line: str
+    by_assignee: pd.DataFrame = field(repr=False)
+    frame_factory: object = field(default=None, repr=False, compare=False)
+
+    @cached_property
+    def df(self):
+        # The filtered frame is only needed for plotting and item listings, so it is built on first access
+        return self.frame_factory() if self.frame_factory else None
+
+    def as_tuple(self):
+        return (self.df, self.total_items, self.total_story_points, self.total_closed_items, self.avg_story_points,
+                self.avg_exec_time, self.max_exec_time, self.min_exec_time, self.exec_time_std,
+                self.tasks_without_estimate, self.top_variability_contributor, self.top_variability_value,
+                self.top_contributors, self.sprint_info_line)
+
+
+def find_sprint_column(df):
+    return next((col for col in df.columns if "iteration path" in col.lower()), None)
+
+
+def _as_datetime(df, col):
+    if col not in df.columns:
+        return pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+    values = df[col]
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    return pd.to_datetime(values, errors='coerce')
+
+
+def _with_columns(df, columns):
+    # Shallow copy: the new frame shares every untouched column with the caller's frame
+    out = df.copy(deep=False)
+    for name, values in columns.items():
+        out[name] = values
+    return out
+
+
+# === Moments: per-group sufficient statistics that can be merged across groups, chunks and exports ===
+def work_item_columns(df):
+    """Project a work-item frame onto the per-row values the moments are built from."""
+    created = _as_datetime(df, 'Created Date')
+    activated = _as_datetime(df, 'Activated Date')
+    closed = _as_datetime(df, 'Closed Date')
+    story_points = df['Story Points']
+    sp = story_points.to_numpy(np.float64) if pd.api.types.is_numeric_dtype(story_points) else pd.to_numeric(story_points, errors='coerce').to_numpy(np.float64)
+    is_closed = closed.notna().to_numpy()
+    # Built from plain arrays without copying, so the frame skips block consolidation
+    return pd.DataFrame({
+        "titled": df['Title'].notna().to_numpy() if 'Title' in df.columns else np.ones(len(df), dtype=bool),
+        "sp": sp,
+        "closed": is_closed,
+        "closed_sp": np.where(is_closed, sp, np.nan),
+        "et": _whole_days(activated, closed),
+        HAS_CREATED_COL: created.notna().to_numpy(),
+    }, index=df.index, copy=False)
+
+
+def _whole_days(start, end):
+    # Rounded down like Timedelta.days; NaN when either date is missing
+    return np.floor((end.to_numpy("datetime64[ns]") - start.to_numpy("datetime64[ns]")) / np.timedelta64(1, "D"))
+
+
+def _group_ids(keys):
+    """Dense group number of every row for the combination of `keys`, and a dict of the key values of each group.
+
+    Groups come out in the order of a sorted groupby(dropna=False, observed=True): by key, missing values last.
+    """
+    codes, levels = [], []
+    for values in keys.values():
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            key_codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+        elif values.dtype == bool:
+            key_codes, uniques = values.to_numpy(np.int8), pd.Index([False, True])
+        else:
+            key_codes, uniques = pd.factorize(values, sort=True)
+        codes.append(key_codes)
+        levels.append(uniques)
+
+    # Mixed-radix number of each row's key combination; the extra digit per key is "missing"
+    space = int(np.prod([len(uniques) + 1 for uniques in levels]))
+    combined = np.zeros(len(codes[0]), dtype=np.int32 if space < 2 ** 31 else np.int64)
+    for key_codes, uniques in zip(codes, levels):
+        combined *= len(uniques) + 1
+        combined += key_codes
+        if (key_codes < 0).any():
+            # Code -1 marks a missing value; move it past the last real key
+            combined[key_codes < 0] += len(uniques) + 1
+    if space <= 4 * len(combined) + 1024:
+        present = np.bincount(combined, minlength=space) > 0
+        group_codes = np.flatnonzero(present)
+        ids = (np.cumsum(present) - 1).take(combined)
     else:
-        df['Execution Time (days)'] = (df['Closed Date'] - df['Activated Date']).dt.days
-
- 
-    total_items = len(df)
-    total_story_points = df['Story Points'].sum()
-    total_closed_items = df['Closed Date'].notna().sum()
-    avg_story_points = round(df['Story Points'].mean(), 2)
-    avg_exec_time = (round(df['Execution Time (days)'].mean(), 2) if df['Execution Time (days)'].notna().any() else "N/A")
-    max_exec_time = (round(df['Execution Time (days)'].max(), 2) if df['Execution Time (days)'].notna().any() else "N/A")
-    min_exec_time = (round(df['Execution Time (days)'].min(), 2) if df['Execution Time (days)'].notna().any() else "N/A")
-    exec_time_std = (round(df['Execution Time (days)'].std(), 2) if df['Execution Time (days)'].notna().any() else "N/A")
-
-    tasks_without_estimate = df['Story Points'].isna().sum()
-    if df['Execution Time (days)'].dropna().empty:
-        contributor_variability = pd.Series(dtype='float64')
+        group_codes, ids = np.unique(combined, return_inverse=True)
+
+    columns = {}
+    for name, values, uniques in reversed(list(zip(keys, keys.values(), levels))):
+        group_codes, key_codes = np.divmod(group_codes, len(uniques) + 1)
+        missing = key_codes == len(uniques)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            columns[name] = pd.Categorical.from_codes(np.where(missing, -1, key_codes), dtype=values.dtype)
+        elif len(uniques) == 0:
+            # A column that is blank on every row, like the Iteration Path of a backlog without sprints
+            columns[name] = np.full(len(key_codes), np.nan, dtype=object)
+        elif missing.any():
+            columns[name] = pd.Series(uniques.take(np.where(missing, 0, key_codes)), dtype=object).mask(missing).values
+        else:
+            columns[name] = uniques.take(key_codes)
+    return ids, {name: columns[name] for name in keys}
+
+
+def _empty_moments(by):
+    return pd.DataFrame({**{name: pd.Series(dtype=dtype) for name, dtype in by.items()},
+                         **{col: pd.Series(dtype="float64") for col in MOMENT_COLUMNS}})
+
+
+def _group_extreme(ufunc, ids, size, values):
+    """Per-group min/max of `values` (fmin/fmax ignore NaN); groups without a value get NaN."""
+    start = np.inf if ufunc in (np.fmin, np.minimum) else -np.inf
+    out = np.full(size, start)
+    ufunc.at(out, ids, values)
+    return np.where(out == start, np.nan, out)
+
+
+def work_item_moments(items, keys):
+    """Aggregate projected work items into one moments row per combination of `keys` (a dict of name -> Series).
+
+    Every moment is a per-group sum (bincount over dense group numbers) or a min/max; execution times are
+    centered on their overall mean for the sum of squares, which keeps the variance accurate.
+    """
+    if len(items) == 0:
+        return _empty_moments({name: values.dtype for name, values in keys.items()})
+    ids, columns = _group_ids(keys)
+    size = len(next(iter(columns.values())))
+
+    def group_sum(values):
+        return np.bincount(ids, weights=values, minlength=size)
+
+    et = items["et"].to_numpy(np.float64)
+    has_et = ~np.isnan(et)
+    et_raw = np.where(has_et, et, 0.0)
+    et_n = group_sum(has_et)
+    shift = et_raw.sum() / et_n.sum() if has_et.any() else 0.0
+    # Multiplying by the mask is cheaper than a second np.where and zeroes the rows without a value the same way
+    centered = (et_raw - shift) * has_et
+    sp = items["sp"].to_numpy(np.float64)
+    has_sp = ~np.isnan(sp)
+    sp_raw = np.where(has_sp, sp, 0.0)
+    closed = items["closed"].to_numpy(bool)
+    titled = items["titled"]
+    titled = np.broadcast_to(np.asarray(titled, dtype=bool), len(items)) if np.ndim(titled) == 0 else titled.to_numpy(bool)
+    rows = np.bincount(ids, minlength=size)
+
+    et_total = group_sum(et_raw)
+    et_sq = group_sum(centered * centered)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # The mean from the raw sum matches a plain mean exactly for whole-day durations
+        et_mean = np.where(et_n > 0, et_total / et_n, np.nan)
+        # The centered sum follows from the raw one, so no extra pass is needed for it
+        et_m2 = np.where(et_n > 0, np.clip(et_sq - (et_total - et_n * shift) ** 2 / et_n, 0.0, None), 0.0)
+    # Min and max only look at rows with an execution time, which also spares the NaN checks of fmin/fmax
+    et_ids, et_values = ids[has_et], et[has_et]
+    return pd.DataFrame({
+        **columns,
+        "rows": rows,
+        # Exports almost always title every item, and then the count is the row count
+        "items": rows if titled.all() else group_sum(titled).astype(np.int64),
+        "sp_sum": group_sum(sp_raw),
+        "sp_n": group_sum(has_sp).astype(np.int64),
+        "closed": group_sum(closed).astype(np.int64),
+        "closed_sp": group_sum(sp_raw * closed),
+        "et_n": et_n.astype(np.int64),
+        "et_mean": et_mean,
+        "et_m2": et_m2,
+        "et_min": _group_extreme(np.minimum, et_ids, size, et_values),
+        "et_max": _group_extreme(np.maximum, et_ids, size, et_values),
+    })
+
+
+def execution_time_extremes(df, keys):
+    """Shortest and longest execution time per combination of `keys`, without the other moments.
+
+    Min and max cannot be taken back out of a group, so incremental updates recompute them with this.
+    """
+    if len(df) == 0:
+        return _empty_moments({name: values.dtype for name, values in keys.items()})[list(keys) + ["et_min", "et_max"]]
+    ids, columns = _group_ids(keys)
+    size = len(next(iter(columns.values())))
+    et = _whole_days(_as_datetime(df, 'Activated Date'), _as_datetime(df, 'Closed Date'))
+    return pd.DataFrame({
+        **columns,
+        "et_min": _group_extreme(np.fmin, ids, size, et),
+        "et_max": _group_extreme(np.fmax, ids, size, et),
+    })
+
+
+def combine_moments(moments, by=()):
+    """Merge moments rows into coarser groups using the parallel (Chan et al.) variance update.
+
+    With no `by` columns the result is a single Series covering every row.
+    """
+    by = list(by)
+    if by and moments.empty:
+        return _empty_moments({col: moments[col].dtype for col in by})
+    if by:
+        ids, columns = _group_ids({col: moments[col] for col in by})
+        size = len(next(iter(columns.values())))
     else:
-        contributor_variability = df.groupby('Assigned To')['Execution Time (days)'].std().sort_values(ascending=False)
+        ids, columns, size = np.zeros(len(moments), dtype=np.intp), {}, 1
+
+    def group_sum(col):
+        values = moments[col].to_numpy()
+        total = np.bincount(ids, weights=values.astype(np.float64, copy=False), minlength=size)
+        # Counts stay integers when they came in as integers
+        return total.astype(values.dtype) if values.dtype.kind in "iu" else total
+
+    et_n = moments["et_n"].to_numpy(np.float64)
+    et_mean = moments["et_mean"].to_numpy(np.float64)
+    weighted = np.bincount(ids, weights=np.nan_to_num(et_mean) * et_n, minlength=size)
+    group_n = np.bincount(ids, weights=et_n, minlength=size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        group_mean = np.where(group_n > 0, weighted / group_n, np.nan)
+        deviation = np.where(et_n > 0, moments["et_m2"].to_numpy(np.float64) + et_n * (et_mean - group_mean[ids]) ** 2, 0.0)
+    out = {
+        "rows": group_sum("rows"),
+        "items": group_sum("items"),
+        "sp_sum": group_sum("sp_sum"),
+        "sp_n": group_sum("sp_n"),
+        "closed": group_sum("closed"),
+        "closed_sp": group_sum("closed_sp"),
+        "et_n": group_sum("et_n"),
+        "et_mean": group_mean,
+        "et_m2": np.bincount(ids, weights=deviation, minlength=size),
+        "et_min": _group_extreme(np.fmin, ids, size, moments["et_min"].to_numpy(np.float64)),
+        "et_max": _group_extreme(np.fmax, ids, size, moments["et_max"].to_numpy(np.float64)),
+    }
+    if not by:
+        return pd.Series({col: values[0] for col, values in out.items()})
+    return pd.DataFrame({**columns, **out})
+
+
+def subtract_moments(total, part, by):
+    """Remove `part` from `total` (both keyed by `by`), inverting the parallel variance update.
+
+    Min and max cannot be inverted; callers must recompute them for groups that lost rows.
+    """
+    m = total.merge(part, on=by, how="left", suffixes=("", "_out"))
+    for col in ["rows", "items", "sp_sum", "sp_n", "closed", "closed_sp"]:
+        m[col] = m[col] - m[f"{col}_out"].fillna(0)
+    n = m["et_n"]
+    n_out = m["et_n_out"].fillna(0)
+    n_left = n - n_out
+    mean_out = m["et_mean_out"].fillna(0.0)
+    mean_left = (n * m["et_mean"].fillna(0.0) - n_out * mean_out) / n_left.where(n_left > 0)
+    correction = ((mean_out - mean_left) ** 2 * n_left * n_out / n.where(n > 0)).where((n_out > 0) & (n_left > 0), 0.0)
+    m["et_m2"] = (m["et_m2"] - m["et_m2_out"].fillna(0.0) - correction).clip(lower=0.0).where(n_left > 1, 0.0)
+    m["et_n"] = n_left
+    m["et_mean"] = mean_left
+    return m[m["rows"] > 0][list(by) + MOMENT_COLUMNS].reset_index(drop=True)
+
+
+def moments_std(m2, n):
+    return np.sqrt(m2 / (n - 1)).where(n > 1) if isinstance(n, pd.Series) else (math.sqrt(m2 / (n - 1)) if n > 1 else np.nan)
+
+
+def scope_moments(moments, scope_key, sprint_number, sprint_col):
+    """Select the moments rows that belong to a scope (planning needs a Created Date, sprint_review one sprint)."""
+    if scope_key == "planning":
+        return moments[moments[HAS_CREATED_COL]]
+    if scope_key == "sprint_review" and sprint_number and sprint_col:
+        return moments[moments[sprint_col] == sprint_number]
+    return moments
+
+
+def _natural_key(value):
+    # "Sprint 10" sorts after "Sprint 9"
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", str(value))]
+
+
+def sprint_trend_table(moments, sprint_col):
+    """Cross-sprint velocity and cycle-time trend, one row per sprint in natural order."""
+    per_sprint = combine_moments(moments, by=[sprint_col])
+    per_sprint = per_sprint[per_sprint[sprint_col].notna()]
+    trend = pd.DataFrame({
+        "Sprint": [str(path).split("\\")[-1] for path in per_sprint[sprint_col]],
+        "Iteration Path": per_sprint[sprint_col].astype(str).values,
+        "Items": per_sprint["rows"].astype(int).values,
+        "Closed Items": per_sprint["closed"].astype(int).values,
+        "Planned Story Points": per_sprint["sp_sum"].values,
+        "Velocity (closed points)": per_sprint["closed_sp"].values,
+        "Avg Cycle Time (days)": per_sprint["et_mean"].round(2).values,
+        "Cycle Time Std (days)": moments_std(per_sprint["et_m2"], per_sprint["et_n"]).round(2).values,
+    })
+    order = sorted(range(len(trend)), key=lambda i: _natural_key(trend["Iteration Path"].iloc[i]))
+    return trend.iloc[order].reset_index(drop=True)
+
+
+def metrics_from_moments(moments, scope_key, sprint_number, frame_factory=None):
+    """Build the KeyMetrics result from a moments table that has an 'Assigned To' column."""
+    if scope_key == "planning":
+        # Planning does not evaluate execution time
+        moments = moments.assign(et_n=0, et_mean=np.nan, et_m2=0.0, et_min=np.nan, et_max=np.nan)
+
+    return metrics_from_totals(combine_moments(moments), combine_moments(moments, by=['Assigned To']), scope_key, sprint_number, frame_factory)
+
+
+def metrics_from_totals(overall, by_assignee, scope_key, sprint_number, frame_factory=None):
+    """Build the KeyMetrics result from already combined moments: one overall row and one row per 'Assigned To'."""
+    by_assignee = by_assignee[by_assignee['Assigned To'].notna()].set_index('Assigned To')
+    by_assignee["et_std"] = moments_std(by_assignee["et_m2"], by_assignee["et_n"])
+
+    has_exec_time = overall["et_n"] > 0
+    avg_exec_time = round(overall["et_mean"], 2) if has_exec_time else "N/A"
+    max_exec_time = round(overall["et_max"], 2) if has_exec_time else "N/A"
+    min_exec_time = round(overall["et_min"], 2) if has_exec_time else "N/A"
+    exec_time_std = round(moments_std(overall["et_m2"], overall["et_n"]), 2) if has_exec_time else "N/A"
+
+    contributor_variability = by_assignee["et_std"].dropna() if has_exec_time else pd.Series(dtype='float64')
     top_variability_contributor = contributor_variability.idxmax() if not contributor_variability.empty else "N/A"
     top_variability_value = round(contributor_variability.max(), 2) if not contributor_variability.empty else 0
 
-    by_assignee = df.groupby('Assigned To').agg(
-        Items_Completed=('Title', 'count'),
-        Total_Story_Points=('Story Points', 'sum'),
-        Avg_Execution_Time=('Execution Time (days)', 'mean')
-    ).sort_values(by='Total_Story_Points', ascending=False).head(3).reset_index()
+    top = by_assignee.sort_values(by="sp_sum", ascending=False).head(3)
+    top_contributors = [
+        f"- {name}: {int(items)} items, {int(points)} points, avg. {round(avg, 1)} days"
+        for name, items, points, avg in zip(top.index, top["items"], top["sp_sum"], top["et_mean"])
+    ]
 
-    top_contributors = []
-    for _, row in by_assignee.iterrows():
-        top_contributors.append(f"- {row['Assigned To']}: {int(row['Items_Completed'])} items, {int(row['Total_Story_Points'])} points, avg. {round(row['Avg_Execution_Time'], 1)} days")
+    sp_n = int(overall["sp_n"])
+    return KeyMetrics(
+        total_items=int(overall["rows"]),
+        total_story_points=float(overall["sp_sum"]),
+        total_closed_items=int(overall["closed"]),
+        avg_story_points=round(overall["sp_sum"] / sp_n, 2) if sp_n else np.nan,
+        avg_exec_time=avg_exec_time,
+        max_exec_time=max_exec_time,
+        min_exec_time=min_exec_time,
+        exec_time_std=exec_time_std,
+        tasks_without_estimate=int(overall["rows"]) - sp_n,
+        top_variability_contributor=top_variability_contributor,
+        top_variability_value=top_variability_value,
+        top_contributors=top_contributors,
+        sprint_info_line=f"- Sprint Number: {sprint_number}" if scope_key == "sprint_review" and sprint_number else "",
+        by_assignee=by_assignee,
+        frame_factory=frame_factory,
+    )
 
-    sprint_info_line = f"- Sprint Number: {sprint_number}" if scope_key == "sprint_review" and sprint_number else ""
 
-    return df, total_items, total_story_points, total_closed_items, avg_story_points, avg_exec_time, max_exec_time, min_exec_time, exec_time_std, tasks_without_estimate, top_variability_contributor, top_variability_value, top_contributors, sprint_info_line
+def _plain_columns(df):
+    # Ingestion types repeated strings as categories; plot code and listings get the plain columns read_csv would give,
+    # so a groupby over a filtered frame does not list every category of the whole export
+    categorical = {col: df[col].astype(df[col].cat.categories.dtype) for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)}
+    return _with_columns(df, categorical) if categorical else df
+
+
+# === Metrics Engine ===
+class MetricsEngine:
+    """Holds the moments of one work-item frame; every scope and sprint is derived from them without rescanning rows."""
+
+    def __init__(self, raw_df, moments=None):
+        self.raw_df = raw_df
+        self.sprint_col = find_sprint_column(raw_df)
+        if moments is None:
+            keys = {}
+            if self.sprint_col:
+                keys[self.sprint_col] = raw_df[self.sprint_col]
+            keys['Assigned To'] = raw_df['Assigned To']
+            keys[HAS_CREATED_COL] = self.items[HAS_CREATED_COL]
+            moments = work_item_moments(self.items, keys)
+        # Precomputed moments come from project_state, which maintains them incrementally across exports
+        self.moments = moments
+        self._results = {}
+        self._sprint_index = None
+
+    @cached_property
+    def items(self):
+        # With precomputed moments the per-row values are only needed once a filtered frame is built
+        return work_item_columns(self.raw_df)
+
+    @cached_property
+    def _parsed_dates(self):
+        return {col: _as_datetime(self.raw_df, col) for col in ('Activated Date', 'Created Date', 'Closed Date')}
+
+    @property
+    def sprint_index(self):
+        """Iteration Path -> row positions, built in one grouping pass the first time it is needed."""
+        if self._sprint_index is None:
+            if self.sprint_col:
+                sprint_values = self.raw_df[self.sprint_col]
+                grouped = sprint_values.groupby(sprint_values, observed=True, sort=False)
+                self._sprint_index = dict(sorted(grouped.indices.items(), key=lambda item: _natural_key(item[0])))
+            else:
+                self._sprint_index = {}
+        return self._sprint_index
+
+    @property
+    def sprints(self):
+        return list(self.sprint_index)
+
+    def _frame(self, mask_col=None, exec_time=None, positions=None):
+        def build():
+            df = _with_columns(self.raw_df, {**self._parsed_dates, EXEC_TIME_COL: self.items["et"] if exec_time is None else exec_time})
+            if positions is not None:
+                df = df.take(positions)
+            elif mask_col is not None:
+                df = df[self.items[mask_col].values]
+            return _plain_columns(df)
+        return build
+
+    def _compute(self, scope_key, sprint_number):
+        moments = scope_moments(self.moments, scope_key, sprint_number, self.sprint_col)
+        if scope_key == "planning":
+            return metrics_from_moments(moments, scope_key, sprint_number, self._frame(HAS_CREATED_COL, pd.NA))
+        if scope_key == "sprint_review" and sprint_number and self.sprint_col:
+            positions = self.sprint_index.get(sprint_number, np.array([], dtype=np.intp))
+            return metrics_from_moments(moments, scope_key, sprint_number, self._frame(positions=positions))
+        return metrics_from_moments(moments, scope_key, sprint_number, self._frame())
+
+    def scope(self, scope_key, sprint_number=None):
+        if scope_key not in SCOPES:
+            raise ValueError(f"Unsupported scope: {scope_key}")
+        # Only sprint_review depends on the sprint; execution, delivery and a review without a sprint share the same figures
+        key = (scope_key, sprint_number if scope_key == "sprint_review" else None)
+        if key not in self._results:
+            if scope_key == "delivery" or key == ("sprint_review", None):
+                self._results[key] = self.scope("execution")
+            else:
+                self._results[key] = self._compute(scope_key, key[1])
+        return self._results[key]
+
+    def all_scopes(self, sprint_number=None):
+        return {scope_key: self.scope(scope_key, sprint_number) for scope_key in SCOPES}
+
+    def sprint_reviews(self):
+        """sprint_review metrics for every sprint, derived from one grouping by sprint and one by sprint and assignee."""
+        if not self.sprint_col:
+            return {}
+        if any(("sprint_review", sprint) not in self._results for sprint in self.sprints):
+            per_sprint = combine_moments(self.moments, by=[self.sprint_col]).set_index(self.sprint_col)
+            cells = combine_moments(self.moments, by=[self.sprint_col, 'Assigned To'])
+            by_sprint = cells.drop(columns=self.sprint_col).groupby(cells[self.sprint_col], observed=True, sort=False)
+            for sprint, by_assignee in by_sprint:
+                key = ("sprint_review", sprint)
+                if key not in self._results:
+                    positions = self.sprint_index.get(sprint, np.array([], dtype=np.intp))
+                    self._results[key] = metrics_from_totals(per_sprint.loc[sprint], by_assignee, "sprint_review", sprint,
+                                                             self._frame(positions=positions))
+        return {sprint: self._results[("sprint_review", sprint)] for sprint in self.sprints}
+
+    def sprint_trend(self):
+        if not self.sprint_col:
+            return pd.DataFrame()
+        if "trend" not in self._results:
+            self._results["trend"] = sprint_trend_table(self.moments, self.sprint_col)
+        return self._results["trend"]
+
+    def type_counts(self):
+        """Items per sprint (rows, natural order) and Work Item Type (columns)."""
+        if not self.sprint_col or 'Work Item Type' not in self.raw_df.columns:
+            return pd.DataFrame()
+        if "type_counts" not in self._results:
+            counts = self.raw_df.groupby([self.sprint_col, 'Work Item Type'], observed=True).size().unstack(fill_value=0)
+            counts.index = counts.index.astype(object)
+            self._results["type_counts"] = counts.reindex(self.sprints, fill_value=0)
+        return self._results["type_counts"]
+
+
+def compute_all_scopes(raw_df, sprint_number=None):
+    return MetricsEngine(raw_df).all_scopes(sprint_number)
+
+
+def compute_key_metrics(raw_df, scope_key, sprint_number):
+    # Only the requested scope is reduced; the other scopes are never touched
+    return MetricsEngine(raw_df).scope(scope_key, sprint_number)
+
+
+def process_key_metrics(raw_df, scope_key, sprint_number):
+    return compute_key_metrics(raw_df, scope_key, sprint_number).as_tuple()
+
+def format_key_metrics(metrics, raw_total, scope_key, sprint_number):
+    return generate_key_metrics(
+        raw_df=None,
+        df=None,
+        sprint_number=sprint_number,
+        total_items=metrics.total_items,
+        tasks_without_estimate=metrics.tasks_without_estimate,
+        avg_exec_time=metrics.avg_exec_time,
+        max_exec_time=metrics.max_exec_time,
+        min_exec_time=metrics.min_exec_time,
+        exec_time_std=metrics.exec_time_std,
+        total_closed_items=metrics.total_closed_items,
+        top_variability_contributor=metrics.top_variability_contributor,
+        top_variability_value=metrics.top_variability_value,
+        scope_key=scope_key,
+        raw_total=raw_total
+    )
 
-def generate_key_metrics(raw_df, df, sprint_number, total_items, total_closed_items, tasks_without_estimate, avg_exec_time, max_exec_time, min_exec_time, exec_time_std, top_variability_contributor, top_variability_value, scope_key):
+def generate_key_metrics(raw_df, df, sprint_number, total_items, total_closed_items, tasks_without_estimate, avg_exec_time, max_exec_time, min_exec_time, exec_time_std, top_variability_contributor, top_variability_value, scope_key, raw_total=None):
 
     sprint_info_line = f"- Sprint Number: {sprint_number}" if scope_key == "sprint_review" and sprint_number else ""
     return f"""
         Key Metrics:
         {sprint_info_line}
-        - Total items (raw): {len(raw_df)}
+        - Total items (raw): {len(raw_df) if raw_total is None else raw_total}
         - Items considered after filtering: {total_items}
         - Items closed: {total_closed_items}
         - Tasks without Story Point estimate: {tasks_without_estimate}
@@ -0,0 +1,128 @@
+import os, time, random, threading
+from email.utils import parsedate_to_datetime
+import httpx
+from openai import OpenAI, DefaultHttpxClient, APIStatusError, APIConnectionError
+
+# === Provider Configuration ===
+PROVIDERS = {
+    "nvidia": {
+        "base_url": "https://integrate.api.nvidia.com/v1",
+        "api_key_env": "NVIDIA_API_KEY",
+        "model": "nvidia/llama-3.1-nemotron-ultra-253b-v1",
+        "context_tokens": 131072,
+    },
+    "openai": {
+        "base_url": None,
+        "api_key_env": "OPENAI_API_KEY",
+        "model": "gpt-3.5-turbo",
+        "context_tokens": 16385,
+    },
+    # Local OpenAI-compatible stub, see mock_llm_server.py
+    "mock": {
+        "base_url": "http://127.0.0.1:8765/v1",
+        "base_url_env": "MOCK_LLM_BASE_URL",
+        "api_key_env": None,
+        "model": "mock-retro-analyst",
+        "context_tokens": 131072,
+    },
+}
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _setting(name, default):
+    # Read lazily: the app loads its .env file after importing this module
+    return float(os.getenv(name, default))
+
+
+def _build_client(provider):
+    config = PROVIDERS[provider]
+    base_url = config["base_url"]
+    if config.get("base_url_env"):
+        base_url = os.getenv(config["base_url_env"], base_url)
+    api_key = os.getenv(config["api_key_env"]) if config["api_key_env"] else "mock"
+    timeout = httpx.Timeout(_setting("LLM_READ_TIMEOUT_SECONDS", "300"), connect=_setting("LLM_CONNECT_TIMEOUT_SECONDS", "10"))
+    http_client = DefaultHttpxClient(
+        timeout=timeout,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=120),
+    )
+    # Retries are handled by with_retries so that backoff and Retry-After handling are the same for every provider
+    return OpenAI(base_url=base_url, api_key=api_key, timeout=timeout, max_retries=0, http_client=http_client)
+
+
+def get_client(provider):
+    """Return the process-wide client for a provider; its connection pool is reused by every request."""
+    if provider not in PROVIDERS:
+        raise ValueError("Unsupported provider")
+    with _clients_lock:
+        if provider not in _clients:
+            _clients[provider] = _build_client(provider)
+        return _clients[provider]
+
+
+def available_providers():
+    """Providers that can be called with the current environment: an API key is set (the mock needs its base URL)."""
+    available = []
+    for provider, config in PROVIDERS.items():
+        env_name = config["api_key_env"] or config.get("base_url_env")
+        if env_name and os.getenv(env_name):
+            available.append(provider)
+    return available
+
+
+def get_client_and_model(provider):
+    return get_client(provider), PROVIDERS[provider]["model"]
+
+
+def close_clients():
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+# === Retries ===
+def retry_after_seconds(error):
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, retry_after=None):
+    cap = _setting("LLM_BACKOFF_MAX_SECONDS", "30")
+    if retry_after is not None:
+        return min(retry_after, cap)
+    # Full jitter: a random delay up to the exponential bound spreads out clients that failed together
+    return random.uniform(0, min(cap, _setting("LLM_BACKOFF_BASE_SECONDS", "0.5") * 2 ** attempt))
+
+
+def with_retries(call, max_retries=None, sleep=time.sleep):
+    max_retries = int(_setting("LLM_MAX_RETRIES", "3")) if max_retries is None else max_retries
+    for attempt in range(max_retries + 1):
+        try:
+            return call()
+        except (APIStatusError, APIConnectionError) as error:
+            status = getattr(error, "status_code", None)
+            if attempt >= max_retries or (status is not None and status not in RETRYABLE_STATUS):
+                raise
+            sleep(backoff_delay(attempt, retry_after_seconds(error)))
@@ -0,0 +1,274 @@
+import os, time, queue, bisect, threading
+from llm_clients import PROVIDERS, available_providers, get_client_and_model, with_retries
+from response_stream import normalized_deltas
+
+# === Dispatch Configuration ===
+HEDGE_DEFAULT_SECONDS = float(os.getenv("AIAGENT_HEDGE_DEFAULT_SECONDS", "8"))
+HEDGE_MIN_SECONDS = float(os.getenv("AIAGENT_HEDGE_MIN_SECONDS", "1"))
+HEDGE_MAX_SECONDS = float(os.getenv("AIAGENT_HEDGE_MAX_SECONDS", "30"))
+HEDGE_QUANTILE = float(os.getenv("AIAGENT_HEDGE_QUANTILE", "0.95"))
+PROVIDER_PREFERENCE = ["nvidia", "openai", "mock"]  # Order used until enough latencies have been observed
+MIN_SAMPLES = 5
+COMPLETION_RESERVE_TOKENS = 2048
+PROMPT_SIZE_BUCKETS = [2000, 8000]  # Time to first token grows with the prompt, so latencies are kept per size class
+LATENCY_BUCKETS_MS = [100, 200, 350, 500, 750, 1000, 1500, 2000, 3000, 4000, 6000, 8000, 12000, 16000, 24000, 32000, 60000, 120000]
+HISTORY_LIMIT = 200
+
+
+class LatencyHistogram:
+    """Time-to-first-token counts in fixed log-spaced buckets; halved when full so recent requests weigh more.
+
+    Requests cancelled before their first token are kept apart as censored: they only show that the first token
+    would have taken at least that long. Quantiles are Kaplan-Meier estimates, so a cancelled request neither
+    passes for a fast answer nor is forgotten.
+    """
+
+    def __init__(self):
+        self.counts = [0.0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.censored = [0.0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    @property
+    def samples(self):
+        return sum(self.counts) + sum(self.censored)
+
+    def observe(self, latency_ms, censored=False):
+        (self.censored if censored else self.counts)[bisect.bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+        if self.samples > HISTORY_LIMIT:
+            self.counts = [count / 2 for count in self.counts]
+            self.censored = [count / 2 for count in self.censored]
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile, in milliseconds."""
+        if not self.samples:
+            return None
+        at_risk = self.samples
+        survival = 1.0
+        for index, (count, censored) in enumerate(zip(self.counts, self.censored)):
+            if count:
+                survival *= 1 - count / at_risk
+                if survival <= 1 - q + 1e-9:
+                    return LATENCY_BUCKETS_MS[index] if index < len(LATENCY_BUCKETS_MS) else HEDGE_MAX_SECONDS * 1000
+            # Requests cancelled in this bucket would have answered later, so they leave the risk set only now
+            at_risk -= count + censored
+        # Too many requests were cancelled to place the quantile; all that is known is that it is slow
+        return HEDGE_MAX_SECONDS * 1000
+
+
+def _size_class(prompt_tokens):
+    return bisect.bisect_left(PROMPT_SIZE_BUCKETS, prompt_tokens)
+
+
+# === One streamed request running in a background thread ===
+class _Attempt:
+    def __init__(self, provider, prompt, temperature, events, throttle=None):
+        self.provider = provider
+        self.client, self.model = get_client_and_model(provider)
+        self.prompt = prompt
+        self.temperature = temperature
+        self.events = events
+        self.throttle = throttle
+        self.started = time.perf_counter()
+        self.first_token_ms = None
+        self.sent = False
+        self.cancelled = threading.Event()
+        self._stream = None
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        try:
+            if self.throttle is not None:
+                # Waits for the provider's rate limit in this thread; a hedge may win and cancel it meanwhile
+                self.throttle()
+                if self.cancelled.is_set():
+                    return
+                # Time spent queued here says nothing about the provider's latency
+                self.started = time.perf_counter()
+            self.sent = True
+            self._stream = with_retries(lambda: self.client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": self.prompt}],
+                temperature=self.temperature,
+                stream=True
+            ))
+            if self.cancelled.is_set():
+                return
+            for text in normalized_deltas(self._stream):
+                if self.cancelled.is_set():
+                    return
+                if self.first_token_ms is None:
+                    self.first_token_ms = (time.perf_counter() - self.started) * 1000
+                self.events.put((self, "token", text))
+            self.events.put((self, "done", None))
+        except Exception as error:
+            if not self.cancelled.is_set():
+                self.events.put((self, "error", error))
+        finally:
+            if self._stream is not None:
+                self._stream.close()
+
+    @property
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def cancel(self):
+        self.cancelled.set()
+        stream = self._stream
+        if stream is not None:
+            try:
+                # Closing the HTTP response ends the reader thread's iteration and frees the connection
+                stream.close()
+            except Exception:
+                pass
+
+
+# === Dispatcher ===
+class Dispatcher:
+    """Routes each prompt to the provider expected to answer first and hedges to a second one when it is late.
+
+    A request goes to the fastest provider for the prompt's size (by median time to first token) whose context
+    fits the prompt. If no token has arrived by that provider's adaptive deadline (the HEDGE_QUANTILE of its
+    observed time to first token), the next provider gets the same request; the first to stream wins and the
+    other request is cancelled.
+    """
+
+    def __init__(self, providers=None, rate_limits=None):
+        self.providers = providers
+        # provider -> blocking callable run before each request to that provider, e.g. a rate limiter
+        self.rate_limits = rate_limits or {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def candidates(self, prompt_tokens):
+        providers = self.providers or available_providers()
+        fitting = [p for p in providers if PROVIDERS[p].get("context_tokens", float("inf")) >= prompt_tokens + COMPLETION_RESERVE_TOKENS]
+        if not fitting:
+            raise ValueError(f"No configured provider accepts a prompt of {prompt_tokens} tokens")
+
+        def expected_ms(provider):
+            median = self._quantile(provider, prompt_tokens, 0.5)
+            return HEDGE_DEFAULT_SECONDS * 1000 if median is None else median
+
+        preference = {p: i for i, p in enumerate(PROVIDER_PREFERENCE)}
+        return sorted(fitting, key=lambda p: (expected_ms(p), preference.get(p, len(preference))))
+
+    def _quantile(self, provider, prompt_tokens, q):
+        with self._lock:
+            histogram = self._histograms.get((provider, _size_class(prompt_tokens)))
+            if histogram is None or histogram.samples < MIN_SAMPLES:
+                return None
+            return histogram.quantile(q)
+
+    def deadline(self, provider, prompt_tokens):
+        """Seconds to wait for the first token before hedging."""
+        latency_ms = self._quantile(provider, prompt_tokens, HEDGE_QUANTILE)
+        if latency_ms is None:
+            return HEDGE_DEFAULT_SECONDS
+        return min(HEDGE_MAX_SECONDS, max(HEDGE_MIN_SECONDS, latency_ms / 1000))
+
+    def observe(self, provider, prompt_tokens, latency_ms, censored=False):
+        with self._lock:
+            self._histograms.setdefault((provider, _size_class(prompt_tokens)), LatencyHistogram()).observe(latency_ms, censored)
+
+    def latency_table(self):
+        """Observed p50/p95 time to first token per provider and prompt size class, for display."""
+        with self._lock:
+            items = list(self._histograms.items())
+        labels = [f"≤{PROMPT_SIZE_BUCKETS[0]}"] + [f"≤{b}" for b in PROMPT_SIZE_BUCKETS[1:]] + [f">{PROMPT_SIZE_BUCKETS[-1]}"]
+        return [
+            {"provider": provider, "prompt_tokens": labels[size], "samples": round(h.samples, 1),
+             "cancelled": round(sum(h.censored), 1), "p50_ms": h.quantile(0.5), "p95_ms": h.quantile(0.95)}
+            for (provider, size), h in sorted(items)
+        ]
+
+    def model_label(self):
+        """Stable description of the candidate models, used as the model part of response cache keys."""
+        providers = self.providers or available_providers()
+        return "auto:" + "+".join(sorted(PROVIDERS[p]["model"] for p in providers))
+
+    def stream(self, prompt, prompt_tokens, temperature):
+        return HedgedStream(self, prompt, prompt_tokens, temperature)
+
+
+class HedgedStream:
+    """Iterates over the text deltas of whichever provider streams first; `provider`, `model` and `hedged` tell which."""
+
+    def __init__(self, dispatcher, prompt, prompt_tokens, temperature):
+        self.dispatcher = dispatcher
+        self.prompt = prompt
+        self.prompt_tokens = prompt_tokens
+        self.temperature = temperature
+        self.provider = None
+        self.model = None
+        self.hedged = False
+        self.first_token_ms = None
+
+    def __iter__(self):
+        dispatcher = self.dispatcher
+        order = dispatcher.candidates(self.prompt_tokens)
+        events = queue.Queue()
+        attempts = []
+        errors = []
+
+        def launch():
+            provider = order[len(attempts)]
+            attempt = _Attempt(provider, self.prompt, self.temperature, events, dispatcher.rate_limits.get(provider))
+            attempts.append(attempt)
+            return attempt
+
+        def resolve_losers(winner):
+            for attempt in attempts:
+                if attempt is not winner and not attempt.cancelled.is_set():
+                    attempt.cancel()
+                    # A cancelled request only proves it was at least this slow, so it is recorded as censored;
+                    # one still waiting for its rate limit was never sent and proves nothing
+                    if attempt.sent:
+                        dispatcher.observe(attempt.provider, self.prompt_tokens, attempt.elapsed_ms, censored=True)
+
+        primary = launch()
+        hedge_at = time.monotonic() + dispatcher.deadline(primary.provider, self.prompt_tokens)
+        winner = None
+        try:
+            while winner is None:
+                timeout = None
+                if len(attempts) < min(2, len(order)):
+                    timeout = max(0.0, hedge_at - time.monotonic())
+                try:
+                    attempt, kind, payload = events.get(timeout=timeout)
+                except queue.Empty:
+                    launch()
+                    self.hedged = True
+                    continue
+                if kind == "error":
+                    errors.append(payload)
+                    attempt.cancelled.set()
+                    dispatcher.observe(attempt.provider, self.prompt_tokens, HEDGE_MAX_SECONDS * 1000)
+                    if len(attempts) < len(order):
+                        # Fail over straight away instead of waiting for the deadline
+                        launch()
+                        self.hedged = len(attempts) > 1
+                    elif all(a.cancelled.is_set() for a in attempts):
+                        raise errors[0]
+                    continue
+                winner = attempt
+                self.provider, self.model = winner.provider, winner.model
+                self.first_token_ms = winner.first_token_ms if winner.first_token_ms is not None else winner.elapsed_ms
+                dispatcher.observe(winner.provider, self.prompt_tokens, self.first_token_ms)
+                resolve_losers(winner)
+                if kind == "done":
+                    return
+                yield payload
+
+            while True:
+                attempt, kind, payload = events.get()
+                if attempt is not winner:
+                    continue
+                if kind == "token":
+                    yield payload
+                elif kind == "done":
+                    return
+                else:
+                    raise payload
+        finally:
+            # Also reached when the caller stops iterating early
+            for attempt in attempts:
+                attempt.cancel()
@@ -0,0 +1,158 @@
+import argparse, json, random, threading, time, uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# === Canned analysis (same shape as the real models: reasoning, report, one plot code block) ===
+MOCK_RESPONSE = """<think>
+The data shows the delivered items per sprint and the execution time per contributor.
+I will summarize delivery, consistency and risks, then plot user stories per sprint.
+</think>
+## Executive Summary
+- Delivery is stable across sprints with a few long-running items.
+- Estimation hygiene can improve: some items have no Story Points.
+
+## Recommendations
+- Split items estimated at 13 points or more before sprint planning.
+- Pair contributors with high execution-time variability.
+
+```python
+fig, ax = plt.subplots(figsize=(6,4))
+df.groupby('Iteration Path').size().plot(kind='bar', ax=ax)
+ax.set_title('Work items per sprint')
+result = fig
+```
+Overall, the team is on track; keep monitoring cycle time outliers.
+"""
+
+
+class MockBehaviour:
+    def __init__(self, latency=0.2, token_delay=0.005, error_rate=0.0, rate_limit_rate=0.0, retry_after=1, response=MOCK_RESPONSE):
+        self.latency = latency
+        self.token_delay = token_delay
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.response = response
+        self.requests = 0
+
+
+def _tokens(text):
+    # Stream roughly word-sized pieces, keeping whitespace attached like real tokenizers do
+    piece = ""
+    for char in text:
+        piece += char
+        if char.isspace():
+            yield piece
+            piece = ""
+    if piece:
+        yield piece
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    behaviour = MockBehaviour()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "mock-retro-analyst", "object": "model", "owned_by": "local"}]})
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        behaviour = self.behaviour
+        behaviour.requests += 1
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+        if random.random() < behaviour.rate_limit_rate:
+            self._send_json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+                            {"Retry-After": str(behaviour.retry_after)})
+            return
+        if random.random() < behaviour.error_rate:
+            self._send_json(503, {"error": {"message": "Service temporarily unavailable", "type": "server_error"}})
+            return
+
+        time.sleep(behaviour.latency)
+        model = request.get("model", "mock-retro-analyst")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in request.get("messages", []))
+        completion_tokens = len(behaviour.response.split())
+
+        if not request.get("stream"):
+            self._send_json(200, {
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": behaviour.response}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                          "total_tokens": prompt_tokens + completion_tokens},
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for index, token in enumerate(_tokens(behaviour.response)):
+                delta = {"role": "assistant", "content": token} if index == 0 else {"content": token}
+                chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                         "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+                self._send_chunk(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                time.sleep(behaviour.token_delay)
+            final = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                     "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+            self._send_chunk(f"data: {json.dumps(final)}\n\n".encode("utf-8"))
+            self._send_chunk(b"data: [DONE]\n\n")
+            self._send_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading, e.g. a cancelled hedge attempt; nothing is left to answer
+            self.close_connection = True
+
+
+def start_mock_server(host="127.0.0.1", port=0, **behaviour):
+    """Start the stub in a background thread; returns (server, base_url). Use port=0 to pick a free port."""
+    handler = type("ConfiguredMockHandler", (MockHandler,), {"behaviour": MockBehaviour(**behaviour)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible chat completions stub for offline testing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.005, help="Seconds between streamed tokens")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of requests answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429 responses")
+    args = parser.parse_args()
+
+    server, base_url = start_mock_server(args.host, args.port, latency=args.latency, token_delay=args.token_delay,
+                                         error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                                         retry_after=args.retry_after)
+    print(f"Mock LLM server listening on {base_url} (set MOCK_LLM_BASE_URL to point the 'mock' provider elsewhere)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
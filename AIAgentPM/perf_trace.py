@@ -0,0 +1,102 @@
+import os, json, time, uuid, logging, threading
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+# === Trace Configuration ===
+base_dir = os.path.dirname(os.path.abspath(__file__))
+TRACE_PATH = os.getenv("AIAGENT_TRACE_PATH", os.path.join(base_dir, ".cache", "traces", "perf.jsonl"))
+TRACE_MAX_BYTES = int(float(os.getenv("AIAGENT_TRACE_MB", "5")) * 1024 * 1024)
+TRACE_BACKUPS = 3
+
+_loggers = {}
+_loggers_lock = threading.Lock()
+
+
+def _trace_logger(path):
+    # One rotating handler per file for the whole process; logging serializes concurrent writes
+    with _loggers_lock:
+        if path not in _loggers:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            logger = logging.getLogger(f"aiagent.perf.{path}")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            handler = RotatingFileHandler(path, maxBytes=TRACE_MAX_BYTES, backupCount=TRACE_BACKUPS, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+            _loggers[path] = logger
+        return _loggers[path]
+
+
+class Trace:
+    """Spans of one pipeline run; each finished span is appended to the JSONL trace file as one line."""
+
+    def __init__(self, path=TRACE_PATH, **context):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.context = context
+        self.spans = []
+        self._logger = _trace_logger(path)
+
+    def record(self, stage, duration_ms, **attrs):
+        span = {"ts": round(time.time(), 3), "run_id": self.run_id, **self.context, "stage": stage,
+                "duration_ms": round(duration_ms, 2), **attrs}
+        self.spans.append(span)
+        self._logger.info(json.dumps(span, default=str))
+        return span
+
+    @contextmanager
+    def span(self, stage, **attrs):
+        """Time a block; the yielded dict can be filled with attributes (token counts, sizes, cache hits)."""
+        started = time.perf_counter()
+        try:
+            yield attrs
+        except Exception as error:
+            attrs["error"] = type(error).__name__
+            raise
+        finally:
+            self.record(stage, (time.perf_counter() - started) * 1000, **attrs)
+
+
+def trace_signature(path=TRACE_PATH):
+    """(mtime, size) of the trace file; changes whenever a span is written or the file rotates."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_spans(path=TRACE_PATH, limit=5000):
+    """Most recent spans from the trace file and its rotated backups, oldest first."""
+    lines = []
+    for candidate in [path] + [f"{path}.{index}" for index in range(1, TRACE_BACKUPS + 1)]:
+        if len(lines) >= limit:
+            break
+        try:
+            with open(candidate, encoding="utf-8") as fh:
+                lines = fh.readlines() + lines
+        except OSError:
+            continue
+    spans = []
+    for line in lines[-limit:]:
+        try:
+            spans.append(json.loads(line))
+        except ValueError:
+            continue
+    return spans
+
+
+def latency_summary(spans, recent_runs=50):
+    """p50/p95 duration per provider, scope and stage over the most recent runs."""
+    import pandas as pd
+    if not spans:
+        return pd.DataFrame()
+    df = pd.DataFrame(spans)
+    for col in ("provider", "scope"):
+        if col not in df.columns:
+            df[col] = None
+    df[["provider", "scope"]] = df[["provider", "scope"]].fillna("-")
+    recent = df["run_id"].drop_duplicates().tail(recent_runs)
+    df = df[df["run_id"].isin(recent)]
+    grouped = df.groupby(["provider", "scope", "stage"])["duration_ms"]
+    summary = grouped.agg(runs="count", p50_ms=lambda s: s.quantile(0.5), p95_ms=lambda s: s.quantile(0.95))
+    return summary.round(1).reset_index()
@@ -0,0 +1,234 @@
+import os, io, atexit, hashlib, queue, tempfile, threading
+import multiprocessing as mp
+from collections import OrderedDict
+
+try:
+    import resource
+except ImportError:  # Not available on Windows: workers run without a memory cap
+    resource = None
+
+# === Pool Configuration ===
+PLOT_WORKERS = int(os.getenv("AIAGENT_PLOT_WORKERS", "2"))
+PLOT_TIMEOUT_SECONDS = float(os.getenv("AIAGENT_PLOT_TIMEOUT_SECONDS", "20"))
+PLOT_MEMORY_MB = int(os.getenv("AIAGENT_PLOT_MEMORY_MB", "2048"))
+FIGURE_CACHE_ENTRIES = 64
+SHARED_FRAMES = 8
+# Shared memory first; containers often cap /dev/shm at 64 MB, so frames that do not fit go to the temp directory
+FRAME_DIRS = [os.path.join(base, f"aiagent_plot_frames_{os.getpid()}")
+              for base in (["/dev/shm"] if os.path.isdir("/dev/shm") else []) + [tempfile.gettempdir()]]
+
+
+class PlotError(Exception):
+    pass
+
+
+class PlotTimeout(PlotError):
+    pass
+
+
+# === Worker process ===
+def _load_frame(path):
+    import pandas as pd
+    if path.endswith(".pkl"):
+        return pd.read_pickle(path)
+    import pyarrow.feather as feather
+    # Memory-mapped: the file is shared through the page cache instead of being sent to every worker
+    return feather.read_table(path, memory_map=True).to_pandas()
+
+
+def _write_frame(frame, directory, name):
+    """Path of `frame` written to `directory` as Arrow, or as a pickle when Arrow cannot store its columns."""
+    import pyarrow.feather as feather
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}.arrow")
+    try:
+        feather.write_feather(frame, path, compression="uncompressed")
+        return path
+    except OSError:
+        _remove(path)
+        raise
+    except Exception:
+        # Object columns with mixed types cannot be stored in Arrow
+        _remove(path)
+    path = os.path.join(directory, f"{name}.pkl")
+    try:
+        frame.to_pickle(path)
+    except OSError:
+        _remove(path)
+        raise
+    return path
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _worker_main(conn, memory_mb):
+    if resource is not None and memory_mb:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import pandas as pd
+
+    frames = OrderedDict()
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        code_snippet, fingerprint, frame_path, fmt = job
+        try:
+            if fingerprint not in frames:
+                frames[fingerprint] = _load_frame(frame_path)
+                while len(frames) > 2:
+                    frames.popitem(last=False)
+            env = {"df": frames[fingerprint], "pd": pd, "plt": plt, "io": io}
+            exec(code_snippet, {}, env)
+            result_obj = env.get("result")
+            figure = result_obj if isinstance(result_obj, plt.Figure) else getattr(result_obj, "figure", None)
+            if not isinstance(figure, plt.Figure):
+                raise ValueError("The code ran but did not return a valid matplotlib Figure. Make sure `result` is set to a plot object.")
+            buffer = io.BytesIO()
+            figure.savefig(buffer, format=fmt, bbox_inches="tight")
+            conn.send(("ok", buffer.getvalue()))
+        except KeyboardInterrupt:
+            break
+        except BaseException as exec_err:
+            conn.send(("error", f"{type(exec_err).__name__}: {exec_err}"))
+        finally:
+            plt.close("all")
+
+
+class _Worker:
+    def __init__(self, context, memory_mb):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, memory_mb), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+
+# === Pool ===
+class PlotPool:
+    """Pre-started worker processes that run generated plot code with a wall-clock timeout and a memory cap.
+
+    Each data frame is written once to an Arrow file that workers memory-map, and rendered figures are
+    cached by hash of (code, data fingerprint, format).
+    """
+
+    def __init__(self, workers=PLOT_WORKERS, timeout=PLOT_TIMEOUT_SECONDS, memory_mb=PLOT_MEMORY_MB):
+        methods = mp.get_all_start_methods()
+        self._context = mp.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self._idle = queue.Queue()
+        for _ in range(max(1, workers)):
+            self._idle.put(_Worker(self._context, memory_mb))
+        self._frames = OrderedDict()
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def _share_frame(self, df, fingerprint):
+        with self._lock:
+            if fingerprint in self._frames:
+                self._frames.move_to_end(fingerprint)
+                return self._frames[fingerprint]
+            name = hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:32]
+            frame = df.reset_index(drop=True)
+            for directory in FRAME_DIRS:
+                try:
+                    path = _write_frame(frame, directory, name)
+                    break
+                except OSError as error:
+                    # Typically ENOSPC on a small /dev/shm; the next directory is on disk
+                    write_error = error
+            else:
+                raise PlotError(f"Could not pass the data to the plot workers: {write_error}")
+            self._frames[fingerprint] = path
+            while len(self._frames) > SHARED_FRAMES:
+                _, old_path = self._frames.popitem(last=False)
+                _remove(old_path)
+            return path
+
+    def render(self, code_snippet, df, fingerprint, fmt="png", info=None):
+        """Return the figure produced by `code_snippet` as PNG or SVG bytes; raises PlotError or PlotTimeout.
+
+        `info`, when given, receives whether the figure came from the cache.
+        """
+        info = {} if info is None else info
+        key = hashlib.sha256("\0".join([code_snippet, fingerprint, fmt]).encode("utf-8")).hexdigest()
+        with self._lock:
+            info["cache_hit"] = key in self._figures
+            if info["cache_hit"]:
+                self._figures.move_to_end(key)
+                return self._figures[key]
+
+        frame_path = self._share_frame(df, fingerprint)
+        worker = self._idle.get()
+        try:
+            if not worker.process.is_alive():
+                # Died while idle (e.g. killed by the OOM killer); a fresh worker takes the job
+                worker = self._replace(worker)
+            try:
+                worker.conn.send((code_snippet, fingerprint, frame_path, fmt))
+                finished = worker.conn.poll(self.timeout)
+            except OSError as error:
+                worker = self._replace(worker)
+                raise PlotError(f"Plot worker could not be reached: {error}") from error
+            if not finished:
+                # A runaway snippet only costs its own worker, which is replaced
+                worker.process.kill()
+                worker = self._replace(worker)
+                raise PlotTimeout(f"Plot code did not finish within {self.timeout:g} seconds")
+            try:
+                status, payload = worker.conn.recv()
+            except (EOFError, OSError):
+                worker = self._replace(worker)
+                raise PlotError("Plot worker exited while running the code (memory limit exceeded?)")
+        finally:
+            self._idle.put(worker)
+
+        if status != "ok":
+            raise PlotError(payload)
+        with self._lock:
+            self._figures[key] = payload
+            while len(self._figures) > FIGURE_CACHE_ENTRIES:
+                self._figures.popitem(last=False)
+        return payload
+
+    def _replace(self, worker):
+        worker.stop()
+        return _Worker(self._context, self.memory_mb)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
+        with self._lock:
+            for path in self._frames.values():
+                _remove(path)
+            self._frames.clear()
+        for directory in FRAME_DIRS:
+            try:
+                os.rmdir(directory)
+            except OSError:
+                pass
@@ -0,0 +1,296 @@
+import os, re, json, threading
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+from keymetrics import (HAS_CREATED_COL, MOMENT_COLUMNS, find_sprint_column, work_item_columns, work_item_moments,
+                        combine_moments, subtract_moments, execution_time_extremes)
+
+# === Store Configuration ===
+base_dir = os.path.dirname(os.path.abspath(__file__))
+STATE_DIR = os.getenv("AIAGENT_PROJECT_STATE_DIR", os.path.join(base_dir, ".cache", "projects"))
+VALUE_COLUMNS = ["titled", "sp", "closed", "closed_sp", "et"]
+DETAIL_COLUMNS = ["Title", "State"]
+SOURCE_COLUMNS = ["Assigned To", "Story Points", "Created Date", "Activated Date", "Closed Date"] + DETAIL_COLUMNS
+MAX_DELTA_LINES = 40
+INCREMENTAL_MAX_SHARE = 0.25
+
+
+@dataclass
+class ExportDelta:
+    previous_export_at: str = None
+    inserted: int = 0
+    updated: int = 0
+    removed: int = 0
+    newly_closed: int = 0
+    lines: list = field(default_factory=list)
+
+    @property
+    def has_previous(self):
+        return self.previous_export_at is not None
+
+    def to_text(self):
+        if not self.has_previous:
+            return "This is the first export of this project; there is no previous export to compare with."
+        summary = (f"Since the previous export ({self.previous_export_at}): {self.inserted} new items, "
+                   f"{self.updated} updated items ({self.newly_closed} newly closed), {self.removed} removed items.")
+        if not self.lines:
+            return summary
+        hidden = self.inserted + self.updated + self.removed - len(self.lines)
+        more = f"\n  - ... and {hidden} more changes" if hidden > 0 else ""
+        return summary + "\n" + "\n".join(f"  - {line}" for line in self.lines) + more
+
+
+@dataclass
+class ExportUpdate:
+    moments: pd.DataFrame
+    delta: ExportDelta
+
+
+def _change_marker(raw_df):
+    """A uint64 per row that changes whenever the work item does."""
+    if "Changed Date" in raw_df.columns:
+        changed = raw_df["Changed Date"]
+        if not pd.api.types.is_datetime64_any_dtype(changed):
+            changed = pd.to_datetime(changed, errors="coerce")
+        return changed.to_numpy("datetime64[ns]").view(np.uint64)
+    # Without a Changed Date column a difference in any stored field counts as a change; the title alone does not
+    columns = [col for col in _stored_columns(raw_df, find_sprint_column(raw_df)) if col not in ("ID", "Title")]
+    return pd.util.hash_pandas_object(pd.DataFrame({col: raw_df[col] for col in columns}, copy=False), index=False).to_numpy()
+
+
+def _dense_span(ids):
+    """(min, span) when integer IDs cover a range small enough for a direct lookup table, else None."""
+    if ids.dtype.kind not in "iu" or not len(ids):
+        return None
+    low, high = int(ids.min()), int(ids.max())
+    return (low, high - low + 1) if high - low < 4 * len(ids) + 1024 else None
+
+
+def _ids_unique(ids):
+    dense = _dense_span(ids)
+    if dense:
+        return bool(np.bincount((ids - dense[0]).astype(np.intp), minlength=dense[1]).max() <= 1)
+    return pd.Index(ids).is_unique
+
+
+def _id_positions(old_ids, new_ids):
+    """Position of every new ID among the old ones, -1 for items that are new."""
+    dense = _dense_span(np.concatenate([old_ids, new_ids])) if new_ids.dtype.kind in "iu" else None
+    if dense:
+        # Work item IDs are mostly consecutive numbers, so a lookup table replaces hashing both sides
+        lookup = np.full(dense[1], -1, dtype=np.int64)
+        lookup[old_ids - dense[0]] = np.arange(len(old_ids))
+        return lookup[new_ids - dense[0]]
+    return pd.Index(old_ids).get_indexer(new_ids)
+
+
+def _stored_columns(raw_df, sprint_col):
+    # Everything the moments and the change descriptions of a later export need, in the types ingestion gave them
+    wanted = ["ID"] + ([sprint_col] if sprint_col else []) + SOURCE_COLUMNS
+    return [col for col in wanted if col in raw_df.columns]
+
+
+def project_items(rows, sprint_col):
+    """One row per work item with its moment keys, the values the moments are built from and the detail columns."""
+    values = work_item_columns(rows)
+    items = {"ID": rows["ID"].values}
+    if sprint_col:
+        items[sprint_col] = rows[sprint_col].values
+    items["Assigned To"] = rows["Assigned To"].values
+    items[HAS_CREATED_COL] = values[HAS_CREATED_COL].values
+    for col in VALUE_COLUMNS:
+        items[col] = values[col].values
+    for col in DETAIL_COLUMNS:
+        if col in rows.columns:
+            items[col] = rows[col].values
+    return pd.DataFrame(items)
+
+
+def _key_columns(sprint_col):
+    return ([sprint_col] if sprint_col else []) + ["Assigned To", HAS_CREATED_COL]
+
+
+def _moments_of(items, keys):
+    return work_item_moments(items[VALUE_COLUMNS], {key: items[key] for key in keys})
+
+
+def _export_keys(raw_df, sprint_col):
+    created = raw_df["Created Date"] if "Created Date" in raw_df.columns else pd.Series(pd.NaT, index=raw_df.index)
+    keys = {sprint_col: raw_df[sprint_col]} if sprint_col else {}
+    keys["Assigned To"] = raw_df["Assigned To"]
+    keys[HAS_CREATED_COL] = (created if pd.api.types.is_datetime64_any_dtype(created) else pd.to_datetime(created, errors="coerce")).notna()
+    return keys
+
+
+def _export_moments(raw_df, sprint_col):
+    # Straight from the export's columns; projecting every row into an items frame first would copy the whole export
+    return work_item_moments(work_item_columns(raw_df)[VALUE_COLUMNS], _export_keys(raw_df, sprint_col))
+
+
+def _updated_moments(moments, outgoing, incoming, raw_df, sprint_col):
+    """Remove the outgoing rows' moments and add the incoming ones'; min/max are recomputed only when they may have moved."""
+    keys = _key_columns(sprint_col)
+    stale_extremes = False
+    if len(outgoing):
+        removed = _moments_of(outgoing, keys)
+        touched = moments.merge(removed, on=keys, suffixes=("", "_out"))
+        # Min and max cannot be subtracted; they can only have changed where a removed time was the group's min or max
+        stale_extremes = bool(((touched["et_min_out"] <= touched["et_min"]) | (touched["et_max_out"] >= touched["et_max"])).any())
+        moments = subtract_moments(moments, removed, keys)
+    if len(incoming):
+        moments = combine_moments(pd.concat([moments, _moments_of(incoming, keys)], ignore_index=True), by=keys)
+    if stale_extremes:
+        # From the execution times alone, which is far cheaper than all moments of the export
+        extremes = execution_time_extremes(raw_df, _export_keys(raw_df, sprint_col))
+        moments = moments.drop(columns=["et_min", "et_max"]).merge(extremes, on=keys, how="left")
+    return moments[keys + MOMENT_COLUMNS]
+
+
+def _describe_changes(old, new, inserted_ids, updated_ids, removed_ids, sprint_col):
+    lines = []
+    for item_id in inserted_ids[:MAX_DELTA_LINES]:
+        lines.append(f"New: {new.at[item_id, 'Title'] if 'Title' in new.columns else item_id} (ID: {item_id})")
+    compared = [(col, col) for col in ("State", "Assigned To", "sp") if col in old.columns and col in new.columns]
+    if sprint_col:
+        compared.append((sprint_col, "Sprint"))
+    for item_id in updated_ids[:max(0, MAX_DELTA_LINES - len(lines))]:
+        before, after = old.loc[item_id], new.loc[item_id]
+        changes = [f"{'Story Points' if col == 'sp' else label}: {before[col]} → {after[col]}"
+                   for col, label in compared if not (pd.isna(before[col]) and pd.isna(after[col])) and before[col] != after[col]]
+        if not before["closed"] and after["closed"]:
+            changes.append("closed")
+        title = after["Title"] if "Title" in new.columns else item_id
+        lines.append(f"Updated: {title} (ID: {item_id})" + (f" – {', '.join(changes)}" if changes else ""))
+    for item_id in removed_ids[:max(0, MAX_DELTA_LINES - len(lines))]:
+        lines.append(f"Removed: {old.at[item_id, 'Title'] if 'Title' in old.columns else item_id} (ID: {item_id})")
+    return lines
+
+
+class ProjectState:
+    """Per-project store of the last export's work items and moments, updated with only the rows that changed.
+
+    Each export is stored as items-<digest>.arrow and moments-<digest>.parquet; meta.json names the current
+    pair and is replaced last, so an interrupted save leaves the previous export in place.
+    """
+
+    def __init__(self, project_key, state_dir=STATE_DIR):
+        self.project_key = project_key
+        self.path = os.path.join(state_dir, re.sub(r"[^\w.-]+", "_", project_key) or "project")
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _load(self):
+        """(meta, moments) of the stored export, or (None, None); the items are read separately and only in part."""
+        _wait_for_save(self.path)
+        try:
+            with open(self._file("meta.json"), encoding="utf-8") as fh:
+                meta = json.load(fh)
+            moments = pd.read_parquet(self._file(f"moments-{meta['last_digest']}.parquet"))
+        except (OSError, ValueError, KeyError):
+            return None, None
+        return meta, moments
+
+    def _items_table(self, meta, columns=None):
+        # Memory-mapped and uncompressed: columns and rows that are never touched are never read from disk
+        return feather.read_table(self._file(f"items-{meta['last_digest']}.arrow"), columns=columns, memory_map=True)
+
+    def _save(self, meta, stored, moments, delta):
+        os.makedirs(self.path, exist_ok=True)
+        digest = meta["last_digest"]
+        items_path = self._file(f"items-{digest}.arrow")
+        feather.write_feather(pd.DataFrame(stored, copy=False), f"{items_path}.tmp", compression="uncompressed")
+        os.replace(f"{items_path}.tmp", items_path)
+        moments.to_parquet(self._file(f"moments-{digest}.parquet.tmp"), index=False)
+        os.replace(self._file(f"moments-{digest}.parquet.tmp"), self._file(f"moments-{digest}.parquet"))
+        meta = {**meta, "delta": asdict(delta)}
+        tmp_path = self._file("meta.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(meta, fh, default=str)
+        # meta.json is replaced last, so a half-written update is ignored on the next load
+        os.replace(tmp_path, self._file("meta.json"))
+        for name in os.listdir(self.path):
+            if name != "meta.json" and not name.startswith((f"items-{digest}.", f"moments-{digest}.")):
+                try:
+                    os.remove(self._file(name))
+                except OSError:
+                    pass  # Still mapped elsewhere (Windows); removed after a later export
+
+    def _save_in_background(self, meta, stored, moments, delta):
+        # Writing a large export takes longer than diffing it; the next load of this project waits for the write
+        thread = threading.Thread(target=self._save, args=(meta, stored, moments, delta), name=f"project-state-{self.project_key}")
+        with _saves_lock:
+            _saves[self.path] = thread
+        thread.start()
+
+    def apply_export(self, raw_df, data_digest):
+        """Diff a new export against the stored one and update the maintained moments.
+
+        Returns None when the export cannot be tracked incrementally (no unique ID column).
+        """
+        if "ID" not in raw_df.columns:
+            return None
+        new_ids = raw_df["ID"].to_numpy()
+        if not _ids_unique(new_ids):
+            return None
+        sprint_col = find_sprint_column(raw_df)
+        meta, moments = self._load()
+
+        if meta and meta.get("last_digest") == data_digest and meta.get("sprint_col") == sprint_col:
+            # The same export again (e.g. a Streamlit rerun): keep the delta computed when it was first seen
+            return ExportUpdate(moments, ExportDelta(**meta["delta"]))
+
+        marker = _change_marker(raw_df)
+        now = datetime.now().isoformat(timespec="seconds")
+        if meta is None or meta.get("sprint_col") != sprint_col:
+            moments = _export_moments(raw_df, sprint_col)
+            delta = ExportDelta(inserted=len(raw_df))
+        else:
+            index = self._items_table(meta, ["ID", "marker"])
+            old_ids, old_marker = index.column("ID").to_numpy(), index.column("marker").to_numpy()
+            old_positions = _id_positions(old_ids, new_ids)
+            known = old_positions >= 0
+            inserted_rows = np.flatnonzero(~known)
+            updated_rows = np.flatnonzero(known)[old_marker[old_positions[known]] != marker[known]]
+            kept = np.zeros(len(old_ids), dtype=bool)
+            kept[old_positions[known]] = True
+            removed_positions = np.flatnonzero(~kept)
+
+            outgoing_positions = np.concatenate([removed_positions, old_positions[updated_rows]])
+            old = project_items(self._items_table(meta).take(outgoing_positions).to_pandas(), sprint_col)
+            new = project_items(raw_df.iloc[np.concatenate([inserted_rows, updated_rows])], sprint_col)
+            if len(old) + len(new) > INCREMENTAL_MAX_SHARE * len(raw_df):
+                # Past this share, subtracting and re-adding rows costs more than aggregating the export afresh
+                moments = _export_moments(raw_df, sprint_col)
+            elif len(old) or len(new):
+                moments = _updated_moments(moments, old, new, raw_df, sprint_col)
+
+            old, new = old.set_index("ID"), new.set_index("ID")
+            inserted_ids, updated_ids = list(new_ids[inserted_rows]), list(new_ids[updated_rows])
+            removed_ids = list(old_ids[removed_positions])
+            newly_closed = int((~old.loc[updated_ids, "closed"].astype(bool) & new.loc[updated_ids, "closed"].astype(bool)).sum())
+            delta = ExportDelta(
+                previous_export_at=meta.get("exported_at"),
+                inserted=len(inserted_ids),
+                updated=len(updated_ids),
+                removed=len(removed_ids),
+                newly_closed=newly_closed,
+                lines=_describe_changes(old, new, inserted_ids, updated_ids, removed_ids, sprint_col),
+            )
+
+        stored = {**{col: raw_df[col] for col in _stored_columns(raw_df, sprint_col)}, "marker": marker}
+        self._save_in_background({"last_digest": data_digest, "sprint_col": sprint_col, "exported_at": now}, stored, moments, delta)
+        return ExportUpdate(moments, delta)
+
+
+_saves = {}
+_saves_lock = threading.Lock()
+
+
+def _wait_for_save(path):
+    with _saves_lock:
+        thread = _saves.pop(path, None)
+    if thread is not None:
+        thread.join()
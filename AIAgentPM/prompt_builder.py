@@ -0,0 +1,193 @@
+import os
+from dataclasses import dataclass
+from string import Template
+import pandas as pd
+from prompts import scope_config, builtin_charts_instructions
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("AIAGENT_PROMPT_TOKEN_BUDGET", "6000"))
+
+STORY_POINTS_GUIDE = """Story Points Guide (Fibonacci Scale):
+- 1: Extra small – One-line change or similar work, can be done in 1 hour.
+- 2: Small – Developer understands the task, requires small problem-solving.
+- 3: Average – Developer knows what to do, no research required.
+- 5: Large – Task is not very common, may require help or some research.
+- 8: Extra Large – Time-consuming, needs research and possibly multiple developers.
+- 13: Warning – Complex, many unknowns, likely won't fit in one sprint.
+- 21: Hazard – Very complex, unclear how to start, many assumptions and unknowns.
+(Note: 21 is the upper limit of the story point scale used in this analysis.)"""
+
+_PROMPT_LAYOUT = """## $key_metrics
+
+$focus$extra_focus
+Also, take into account the Story Points scale used to estimate task effort.
+
+Project Data:
+- Total items: $total_items
+- Total Story Points: $total_story_points
+- Total Closed Items: $total_closed_items
+- Average Story Points per item: $avg_story_points
+- The Sprint information can be found in Iteration Path column in the data frame
+- The only Work Item Type that will receive Story Points is User Stories.
+- Maximum execution time for a single item: $max_exec_time days
+- Minimum execution time for a single item: $min_exec_time days
+- Standard deviation of execution time: $exec_time_std days
+- Tasks without Story Point estimate: $tasks_without_estimate
+- Contributor with highest time variability: $top_variability_contributor ($top_variability_value days)
+- Top contributors:
+  $top_contributors$work_items$trend
+
+$story_points_guide
+
+Instructions:
+$instructions
+"""
+
+
+def _escape(text):
+    return text.replace("$", "$$")
+
+
+def _scope_template(config, instructions):
+    return Template(Template(_PROMPT_LAYOUT).safe_substitute(
+        focus=_escape(config["prompt"]),
+        instructions=_escape(instructions),
+        story_points_guide=_escape(STORY_POINTS_GUIDE),
+    ))
+
+
+# Scope text is static, so it is substituted once at import; only the data placeholders remain per request
+TEMPLATES = {
+    scope_key: _scope_template(config, config["instructions"] + config["plot_instructions"])
+    for scope_key, config in scope_config.items()
+}
+# Without the code-generation instructions, for when the built-in charts are shown instead
+CHART_TEMPLATES = {
+    scope_key: _scope_template(config, config["instructions"] + "\n" + builtin_charts_instructions)
+    for scope_key, config in scope_config.items()
+}
+
+
+STORY_POINT_BUCKETS = [float("-inf"), 1, 2, 3, 5, 8, 13, 21, float("inf")]
+STORY_POINT_LABELS = ["1 or less", "2", "3", "4-5", "6-8", "9-13", "14-21", "over 21"]
+
+
+# === Token counting ===
+_encoding = None
+
+
+def count_tokens(text):
+    """Count tokens with tiktoken's cl100k_base when available, otherwise estimate ~4 characters per token."""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+# === Work item listings, from most to least detailed ===
+def _listing_full(df):
+    lines = "  - " + df["Title"].astype(str) + " (ID: " + df["ID"].astype(str) + ")"
+    return "\n".join(lines.tolist())
+
+
+def _listing_by_type(df):
+    if "Work Item Type" not in df.columns:
+        return None
+    grouped = df.groupby("Work Item Type", observed=True).agg(n_items=("Title", "size"), points=("Story Points", "sum"))
+    return "\n".join(f"  - {row.Index}: {row.n_items} items, {row.points:g} points" for row in grouped.itertuples())
+
+
+def _listing_by_assignee(df):
+    grouped = df.groupby("Assigned To", observed=True, dropna=False).agg(n_items=("Title", "size"), points=("Story Points", "sum"))
+    return "\n".join(
+        f"  - {'Unassigned' if pd.isna(row.Index) else row.Index}: {row.n_items} items, {row.points:g} points"
+        for row in grouped.itertuples())
+
+
+def _listing_by_points(df):
+    buckets = pd.cut(df["Story Points"], STORY_POINT_BUCKETS, labels=STORY_POINT_LABELS, right=True)
+    counts = buckets.value_counts(sort=False)
+    lines = [f"  - {label} points: {int(count)} items" for label, count in counts.items() if count]
+    unestimated = int(df["Story Points"].isna().sum())
+    if unestimated:
+        lines.append(f"  - no estimate: {unestimated} items")
+    return "\n".join(lines)
+
+
+LISTINGS = [
+    ("full", "Work items in Sprint {sprint}", _listing_full),
+    ("by_type", "Work items in Sprint {sprint} grouped by Work Item Type", _listing_by_type),
+    ("by_assignee", "Work items in Sprint {sprint} grouped by assignee", _listing_by_assignee),
+    ("by_points", "Work items in Sprint {sprint} grouped by Story Points", _listing_by_points),
+]
+
+
+@dataclass
+class BuiltPrompt:
+    text: str
+    tokens: int
+    budget: int
+    listing: str
+
+
+def build_prompt(key_metrics_text, metrics, scope_key, sprint_number, sprint_trend=None, budget=None, changes_text=None,
+                 builtin_charts=False):
+    """Assemble the analysis prompt for a scope, shrinking the work item listing until it fits the token budget.
+
+    With `changes_text` the work item listing is replaced by what changed since the previous export.
+    With `builtin_charts` the model is not asked to write plot code.
+    """
+    budget = PROMPT_TOKEN_BUDGET if budget is None else budget
+    extra_focus = ""
+    if scope_key == "sprint_review" and sprint_number:
+        extra_focus += f"\nThis is Sprint {sprint_number}. Focus your analysis specifically on tasks completed during this sprint."
+    trend = ""
+    if sprint_trend is not None and not sprint_trend.empty:
+        extra_focus += "\nThis review covers all sprints. Compare delivery across sprints and comment on the velocity and cycle-time trend."
+        trend = "\n- Cross-sprint velocity and cycle-time trend:\n" + sprint_trend.drop(columns=["Iteration Path"]).to_string(index=False)
+
+    values = {
+        "key_metrics": "\n".join(line.strip() for line in key_metrics_text.strip().splitlines()),
+        "extra_focus": extra_focus,
+        "total_items": metrics.total_items,
+        "total_story_points": metrics.total_story_points,
+        "total_closed_items": metrics.total_closed_items,
+        "avg_story_points": metrics.avg_story_points,
+        "max_exec_time": metrics.max_exec_time,
+        "min_exec_time": metrics.min_exec_time,
+        "exec_time_std": metrics.exec_time_std,
+        "tasks_without_estimate": metrics.tasks_without_estimate,
+        "top_variability_contributor": metrics.top_variability_contributor,
+        "top_variability_value": metrics.top_variability_value,
+        "top_contributors": "\n  ".join(metrics.top_contributors),
+        "trend": trend,
+    }
+    template = (CHART_TEMPLATES if builtin_charts else TEMPLATES)[scope_key]
+
+    if changes_text:
+        extra_focus = values["extra_focus"] + "\nFocus on what changed since the previous export of this project."
+        text = template.substitute(values, extra_focus=extra_focus, work_items=f"\n- Changes since the previous export:\n  {changes_text}")
+        return BuiltPrompt(text, count_tokens(text), budget, "changes")
+
+    df = metrics.df if scope_key == "sprint_review" and sprint_number else None
+    if df is None or "Title" not in df.columns or "ID" not in df.columns:
+        text = template.substitute(values, work_items="")
+        return BuiltPrompt(text, count_tokens(text), budget, "none")
+
+    for name, header, render in LISTINGS:
+        listing = render(df)
+        if listing is None:
+            continue
+        text = template.substitute(values, work_items=f"\n- {header.format(sprint=sprint_number)}:\n{listing}")
+        tokens = count_tokens(text)
+        if tokens <= budget:
+            return BuiltPrompt(text, tokens, budget, name)
+
+    # Nothing fits: keep only the item count, the metrics above already summarize the sprint
+    text = template.substitute(values, work_items=f"\n- Work items in Sprint {sprint_number}: {len(df)} (listing omitted to fit the token budget)")
+    return BuiltPrompt(text, count_tokens(text), budget, "summary")
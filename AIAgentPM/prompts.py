@@ -17,6 +17,8 @@ scope_config = {
             "- Use bullet points for insights and recommendations.\n"
             "- Keep the tone professional and oriented to business stakeholders.\n"
             "- End the report with actionable suggestions for the team to improve future planning."
+        ),
+        "plot_instructions": (
             "Also: \n"
             "After the written analysis, generate Python code using pandas and matplotlib (as plt) to create a visualization\n"
             "- Use `df` as the DataFrame.\n"
@@ -49,6 +51,8 @@ scope_config = {
             "- Use bullet points for each insight.\n"
             "- Be direct but constructive — the reader is the Product Manager.\n"
             "- Conclude with recommendations and/or action items to improve delivery going forward."
+        ),
+        "plot_instructions": (
             "Also: \n"
             "After the written analysis, generate Python code using pandas and matplotlib (as plt) to create a visualization\n"
             "- Use `df` as the DataFrame.\n"
@@ -88,6 +92,8 @@ scope_config = {
             "- Mention any feedback received and alignment with the sprint goal.\n"
             "- Emphasize positive outcomes and team contributions.\n"
             "- Use a tone that informs both technical and non-technical audiences while being always positive."
+        ),
+        "plot_instructions": (
             "Also: \n"
             "After the written analysis, generate Python code using pandas and matplotlib (as plt) to create a visualization\n"
             "- Use `df` as the DataFrame.\n"
@@ -108,6 +114,8 @@ scope_config = {
             "- Generate an executive summary."
             "- Highlight strengths, bottlenecks, and performance patterns."
             "- Suggest areas for improvement in future deliveries."
+        ),
+        "plot_instructions": (
             "Also: \n"
             "After the written analysis, generate Python code using pandas and matplotlib (as plt) to create a visualization\n"
             "- Use `df` as the DataFrame.\n"
@@ -120,3 +128,9 @@ scope_config = {
         )
     }
 }
+
+# Used instead of a scope's plot_instructions when the app renders its built-in charts
+builtin_charts_instructions = (
+    "- The charts for this report are generated separately from the same data. "
+    "Do NOT write any code; return only the text report."
+)
@@ -0,0 +1,145 @@
+from llm_clients import with_retries
+
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+CODE_OPEN = "```python"
+CODE_CLOSE = "```"
+
+# Markers looked for in each state, and the state each marker switches to
+_TRANSITIONS = {
+    "prose": {THINK_OPEN: "reasoning", CODE_OPEN: "code"},
+    "reasoning": {THINK_CLOSE: "prose"},
+    "code": {CODE_CLOSE: "prose"},
+}
+
+
+class ResponseSplitter:
+    """Incrementally separates a model response into <think> reasoning, prose and ```python code.
+
+    `feed` returns the events produced by the new text: ("reasoning", text), ("prose", text), ("code", text)
+    and ("code_done", full_code) as soon as a code fence closes. Text that could be the start of a marker
+    split across two chunks is held back until the next chunk arrives.
+    """
+
+    def __init__(self):
+        self.state = "prose"
+        self._pending = ""
+        self._code = []
+        self.reasoning = []
+        self.sections = [[]]
+        self.code_blocks = []
+
+    def _emit(self, text, events):
+        if not text:
+            return
+        if self.state == "reasoning":
+            self.reasoning.append(text)
+        elif self.state == "code":
+            self._code.append(text)
+        else:
+            self.sections[-1].append(text)
+        events.append((self.state, text))
+
+    def _switch(self, new_state, events):
+        if self.state == "code":
+            code = "".join(self._code).strip()
+            self.code_blocks.append(code)
+            self.sections.append([])
+            self._code = []
+            events.append(("code_done", code))
+        self.state = new_state
+
+    def feed(self, text):
+        events = []
+        buffer = self._pending + text
+        self._pending = ""
+        while buffer:
+            markers = _TRANSITIONS[self.state]
+            found = [(buffer.find(marker), marker) for marker in markers if marker in buffer]
+            if found:
+                index, marker = min(found)
+                self._emit(buffer[:index], events)
+                self._switch(markers[marker], events)
+                buffer = buffer[index + len(marker):]
+                continue
+            hold = max((n for marker in markers for n in range(1, len(marker)) if buffer.endswith(marker[:n])), default=0)
+            self._emit(buffer[:len(buffer) - hold], events)
+            self._pending = buffer[len(buffer) - hold:]
+            break
+        return events
+
+    def close(self):
+        events = []
+        self._emit(self._pending, events)
+        self._pending = ""
+        if self.state == "code":
+            # An unterminated fence still yields its code
+            self._switch("prose", events)
+        return events
+
+    @property
+    def reasoning_text(self):
+        return "".join(self.reasoning).strip()
+
+    @property
+    def partial_code(self):
+        return "".join(self._code).strip()
+
+    @property
+    def final_response(self):
+        return "".join("".join(section) for section in self.sections).strip()
+
+    @property
+    def code_snippet(self):
+        return self.code_blocks[0] if self.code_blocks else None
+
+    @property
+    def before_code(self):
+        return "".join(self.sections[0]).strip()
+
+    @property
+    def after_code(self):
+        return "".join(self.sections[1]).strip() if len(self.sections) > 1 else ""
+
+
+def split_response(text):
+    splitter = ResponseSplitter()
+    splitter.feed(text)
+    splitter.close()
+    return splitter
+
+
+def normalized_deltas(stream):
+    """Text deltas of a chat completion stream in one format for every provider.
+
+    Providers that send reasoning in a separate `reasoning_content` field get it wrapped in <think> tags,
+    so ResponseSplitter separates it the same way as inline reasoning.
+    """
+    in_reasoning = False
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        reasoning = getattr(delta, "reasoning_content", None)
+        if reasoning:
+            yield reasoning if in_reasoning else THINK_OPEN + reasoning
+            in_reasoning = True
+        if delta.content:
+            yield (THINK_CLOSE + delta.content) if in_reasoning else delta.content
+            in_reasoning = False
+    if in_reasoning:
+        yield THINK_CLOSE
+
+
+def stream_completion(client, model, prompt, temperature):
+    """Yield the text deltas of a streamed chat completion; opening the stream is retried on transient errors."""
+    stream = with_retries(lambda: client.chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=temperature,
+        stream=True
+    ))
+    try:
+        yield from normalized_deltas(stream)
+    finally:
+        stream.close()
@@ -0,0 +1,85 @@
+import argparse
+import pandas as pd
+from keymetrics import (SCOPES, HAS_CREATED_COL, MOMENT_COLUMNS, find_sprint_column, work_item_columns, work_item_moments,
+                        combine_moments, moments_std, scope_moments, metrics_from_moments, format_key_metrics)
+
+# Only the columns keymetrics reads are loaded; everything else in the export is skipped by the CSV parser
+USED_COLUMNS = ['Title', 'Story Points', 'Assigned To', 'Created Date', 'Activated Date', 'Closed Date']
+DEFAULT_CHUNKSIZE = 200_000
+
+
+class StreamedMetrics:
+    """Online aggregates of a CSV export that was read chunk by chunk; no work-item rows are retained."""
+
+    def __init__(self, moments, sprint_col, total_rows):
+        self.moments = moments
+        self.sprint_col = sprint_col
+        self.total_rows = total_rows
+
+    def scope(self, scope_key, sprint_number=None):
+        if scope_key not in SCOPES:
+            raise ValueError(f"Unsupported scope: {scope_key}")
+        moments = scope_moments(self.moments, scope_key, sprint_number, self.sprint_col)
+        return metrics_from_moments(moments, scope_key, sprint_number)
+
+    def all_scopes(self, sprint_number=None):
+        return {scope_key: self.scope(scope_key, sprint_number) for scope_key in SCOPES}
+
+    def by_sprint(self):
+        if not self.sprint_col:
+            return pd.DataFrame()
+        per_sprint = combine_moments(self.moments, by=[self.sprint_col]).set_index(self.sprint_col)
+        per_sprint["et_std"] = moments_std(per_sprint["et_m2"], per_sprint["et_n"])
+        return per_sprint
+
+    def key_metrics_text(self, scope_key, sprint_number=None):
+        return format_key_metrics(self.scope(scope_key, sprint_number), self.total_rows, scope_key, sprint_number)
+
+
+def _chunk_moments(chunk, sprint_col):
+    items = work_item_columns(chunk)
+    keys = {}
+    if sprint_col:
+        keys[sprint_col] = chunk[sprint_col]
+    keys['Assigned To'] = chunk['Assigned To']
+    keys[HAS_CREATED_COL] = items[HAS_CREATED_COL]
+    return work_item_moments(items, keys)
+
+
+def stream_key_metrics(path, chunksize=DEFAULT_CHUNKSIZE):
+    """Read a work-item CSV in chunks and fold each chunk into running per-(sprint, assignee) moments.
+
+    Peak memory is one chunk plus the moments table, whatever the size of the file.
+    """
+    header = pd.read_csv(path, nrows=0)
+    sprint_col = find_sprint_column(header)
+    usecols = [col for col in header.columns if col in USED_COLUMNS or col == sprint_col]
+
+    running = None
+    key_cols = None
+    total_rows = 0
+    for chunk in pd.read_csv(path, usecols=usecols, chunksize=chunksize):
+        total_rows += len(chunk)
+        part = _chunk_moments(chunk, sprint_col)
+        if running is None:
+            running = part
+            key_cols = [col for col in part.columns if col not in MOMENT_COLUMNS]
+        else:
+            running = combine_moments(pd.concat([running, part], ignore_index=True), by=key_cols)
+
+    if running is None:
+        running = _chunk_moments(pd.read_csv(path, usecols=usecols, nrows=0), sprint_col)
+    return StreamedMetrics(running, sprint_col, total_rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute key metrics of a large work-item export with bounded memory.")
+    parser.add_argument("csv", help="Path to the Azure DevOps CSV export")
+    parser.add_argument("--scope", choices=SCOPES, default="delivery")
+    parser.add_argument("--sprint", default=None, help="Iteration Path of the sprint (sprint_review scope)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    args = parser.parse_args()
+
+    streamed = stream_key_metrics(args.csv, chunksize=args.chunksize)
+    print(streamed.key_metrics_text(args.scope, args.sprint).strip())
+    print("\n  ".join(["Top contributors:"] + streamed.scope(args.scope, args.sprint).top_contributors))
@@ -0,0 +1,93 @@
+import argparse
+import numpy as np
+import pandas as pd
+
+# === Generator Configuration ===
+PROJECT_NAME = "Synthetic Project"
+SPRINT_DAYS = 14
+START_DATE = pd.Timestamp("2024-01-08")
+WORK_ITEM_TYPES = ["User Story", "Task", "Bug"]
+WORK_ITEM_WEIGHTS = [0.55, 0.30, 0.15]
+STORY_POINTS = [1, 2, 3, 5, 8, 13, 21]
+STORY_POINT_WEIGHTS = [0.10, 0.20, 0.25, 0.22, 0.13, 0.07, 0.03]
+TITLE_WORDS = ["Checkout", "Login", "Search", "Profile", "Invoice", "Report", "Export", "Dashboard", "Payment", "Onboarding"]
+TITLE_VERBS = ["Implement", "Fix", "Refactor", "Validate", "Design", "Migrate", "Document", "Test"]
+DEFAULT_CHUNK_ROWS = 500_000
+
+
+def generate_work_items(rows, sprints=12, assignees=8, missing_points=0.1, missing_assignee=0.05, missing_dates=0.05, seed=0, first_id=1):
+    """Build an Azure DevOps-like work item frame with vectorized random draws; the same seed gives the same frame.
+
+    Only User Stories receive Story Points. Items of the last sprints are partly still open, so Activated and
+    Closed Date are missing for some of them in addition to the `missing_dates` rate.
+    """
+    rng = np.random.default_rng(seed)
+    sprint = rng.integers(1, sprints + 1, rows)
+    item_type = rng.choice(WORK_ITEM_TYPES, rows, p=WORK_ITEM_WEIGHTS)
+    people = np.array([f"Developer {n:02d}" for n in range(1, assignees + 1)], dtype=object)
+    assigned = people[rng.integers(0, assignees, rows)]
+    assigned[rng.random(rows) < missing_assignee] = None
+
+    points = rng.choice(STORY_POINTS, rows, p=STORY_POINT_WEIGHTS).astype("float64")
+    points[(item_type != "User Story") | (rng.random(rows) < missing_points)] = np.nan
+
+    sprint_start = START_DATE + pd.to_timedelta((sprint - 1) * SPRINT_DAYS, unit="D")
+    created = sprint_start - pd.to_timedelta(rng.integers(1, 30, rows), unit="D")
+    activated = sprint_start + pd.to_timedelta(rng.integers(0, SPRINT_DAYS - 2, rows), unit="D")
+    # Cycle time grows with the estimate; unestimated items behave like 3-pointers
+    effort = np.where(np.isnan(points), 3.0, points)
+    cycle_days = np.maximum(0, rng.gamma(2.0, effort / 2.0 + 0.5)).round()
+    closed = activated + pd.to_timedelta(cycle_days, unit="D")
+
+    # The most recent sprints are still in progress
+    open_share = np.clip((sprint - (sprints - 2)) / 3.0, 0.0, 1.0) * 0.6
+    is_open = rng.random(rows) < open_share
+    not_started = is_open & (rng.random(rows) < 0.4)
+    created = pd.Series(created).mask(rng.random(rows) < missing_dates)
+    activated = pd.Series(activated).mask(not_started | (rng.random(rows) < missing_dates))
+    closed = pd.Series(closed).mask(is_open | activated.isna().values | (rng.random(rows) < missing_dates))
+    state = np.where(closed.notna(), "Closed", np.where(activated.notna(), "Active", "New"))
+
+    titles = (pd.Series(rng.choice(TITLE_VERBS, rows)) + " " + pd.Series(rng.choice(TITLE_WORDS, rows))
+              + " #" + pd.Series(np.arange(first_id, first_id + rows)).astype(str))
+    return pd.DataFrame({
+        "ID": np.arange(first_id, first_id + rows),
+        "Work Item Type": item_type,
+        "Title": titles.values,
+        "Assigned To": assigned,
+        "State": state,
+        "Story Points": points,
+        "Iteration Path": f"{PROJECT_NAME}\\Sprint " + pd.Series(sprint).astype(str).values,
+        "Created Date": created.values,
+        "Activated Date": activated.values,
+        "Closed Date": closed.values,
+    })
+
+
+def write_synthetic_csv(path, rows, chunk_rows=DEFAULT_CHUNK_ROWS, seed=0, **options):
+    """Write `rows` synthetic work items to a CSV in chunks, so millions of rows never sit in memory at once."""
+    written = 0
+    chunk = 0
+    while written < rows or chunk == 0:
+        size = min(chunk_rows, rows - written)
+        frame = generate_work_items(size, seed=[seed, chunk], first_id=written + 1, **options)
+        frame.to_csv(path, mode="w" if chunk == 0 else "a", header=chunk == 0, index=False, date_format="%m/%d/%Y %I:%M:%S %p")
+        written += size
+        chunk += 1
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic Azure DevOps work item export.")
+    parser.add_argument("output", help="CSV file to write")
+    parser.add_argument("--rows", type=int, default=10_000, help="Number of work items (1k to 5M)")
+    parser.add_argument("--sprints", type=int, default=12)
+    parser.add_argument("--assignees", type=int, default=8)
+    parser.add_argument("--missing-points", type=float, default=0.1, help="Share of User Stories without Story Points")
+    parser.add_argument("--missing-assignee", type=float, default=0.05, help="Share of unassigned items")
+    parser.add_argument("--missing-dates", type=float, default=0.05, help="Share of missing Created/Activated/Closed dates")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write_synthetic_csv(args.output, args.rows, seed=args.seed, sprints=args.sprints, assignees=args.assignees,
+                        missing_points=args.missing_points, missing_assignee=args.missing_assignee, missing_dates=args.missing_dates)
+    print(f"Wrote {args.rows} work items to {args.output}")
@@ -0,0 +1,4 @@
+import os, sys
+
+# The app modules live next to this directory rather than in an installed package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,41 @@
+import io
+import pandas as pd
+import pytest
+from ingestion import parse_work_items
+from keymetrics import SCOPES, process_key_metrics
+from synthetic_data import generate_work_items
+
+
+def _export(**blank):
+    raw = generate_work_items(2000, seed=3)
+    for col in blank:
+        raw[col] = None
+    return raw.to_csv(index=False).encode("utf-8")
+
+
+@pytest.mark.parametrize("parse", [lambda data: pd.read_csv(io.BytesIO(data)), parse_work_items], ids=["read_csv", "typed"])
+@pytest.mark.parametrize("blank_col", ["Iteration Path", "Assigned To"])
+def test_blank_key_column(parse, blank_col):
+    df = parse(_export(**{blank_col: True}))
+    for scope_key in SCOPES:
+        result = process_key_metrics(df, scope_key, None)
+        assert result[1] == (len(df[df["Created Date"].notna()]) if scope_key == "planning" else len(df))
+        if blank_col == "Assigned To":
+            assert result[-2] == []
+            assert result[10] == "N/A"
+
+
+def test_blank_iteration_path_matches_export_without_sprints():
+    df = parse_work_items(_export(**{"Iteration Path": True}))
+    without = df.drop(columns="Iteration Path")
+    for scope_key in SCOPES:
+        assert process_key_metrics(df, scope_key, None)[1:] == process_key_metrics(without, scope_key, None)[1:]
+
+
+def test_filtered_frame_has_plain_columns():
+    df = parse_work_items(_export())
+    sprint = sorted(df["Iteration Path"].dropna().unique())[0]
+    frame = process_key_metrics(df, "sprint_review", sprint)[0]
+    assert not any(isinstance(dtype, pd.CategoricalDtype) for dtype in frame.dtypes)
+    counts = frame.groupby("Iteration Path").size()
+    assert counts.to_dict() == {sprint: len(frame)}
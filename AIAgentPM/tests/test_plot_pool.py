@@ -0,0 +1,39 @@
+import os
+import pandas as pd
+import pytest
+import plot_pool
+from plot_pool import PlotError, PlotPool
+
+SNIPPET = "fig, ax = plt.subplots()\nax.plot(df['x'])\nresult = fig\n"
+
+
+@pytest.fixture
+def pool():
+    pool = PlotPool(workers=1, timeout=30)
+    yield pool
+    pool.close()
+
+
+def test_frame_falls_back_when_shared_memory_is_unusable(tmp_path, monkeypatch, pool):
+    blocked = tmp_path / "full"
+    blocked.write_text("")  # A file where a directory is expected fails like a full /dev/shm: with an OSError
+    monkeypatch.setattr(plot_pool, "FRAME_DIRS", [str(blocked / "frames"), str(tmp_path / "frames")])
+    path = pool._share_frame(pd.DataFrame({"x": [1, 2, 3]}), "fingerprint")
+    assert os.path.dirname(path) == str(tmp_path / "frames")
+
+
+def test_frame_write_failure_is_a_plot_error(tmp_path, monkeypatch, pool):
+    blocked = tmp_path / "full"
+    blocked.write_text("")
+    monkeypatch.setattr(plot_pool, "FRAME_DIRS", [str(blocked / "frames")])
+    with pytest.raises(PlotError):
+        pool.render(SNIPPET, pd.DataFrame({"x": [1, 2, 3]}), "fingerprint")
+
+
+def test_worker_that_died_while_idle_is_replaced(pool):
+    pytest.importorskip("matplotlib")
+    worker = pool._idle.queue[0]
+    worker.process.kill()
+    worker.process.join()
+    assert pool.render(SNIPPET, pd.DataFrame({"x": [1, 2, 3]}), "fingerprint").startswith(b"\x89PNG")
+    assert pool._idle.queue[0].process.is_alive()
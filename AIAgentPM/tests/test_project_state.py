@@ -0,0 +1,56 @@
+import math
+import numpy as np
+import pandas as pd
+import pytest
+from ingestion import content_digest, parse_work_items
+from keymetrics import MetricsEngine
+from project_state import ProjectState
+from synthetic_data import generate_work_items
+
+
+def _next_export(raw, rng, step, share, first_id):
+    """The previous export with some items removed, some edited and some new ones appended."""
+    changes = max(1, int(len(raw) * share))
+    raw = raw.drop(index=rng.choice(raw.index, changes, replace=False)).reset_index(drop=True)
+    edited = rng.choice(raw.index, changes, replace=False)
+    raw.loc[edited, "Story Points"] = rng.choice([1.0, 3.0, 8.0, np.nan], changes)
+    raw.loc[edited, "Assigned To"] = rng.choice(["Developer 01", "Developer 99", None], changes)
+    raw.loc[edited, "Iteration Path"] = rng.choice(raw["Iteration Path"].dropna().unique(), changes)
+    closing = edited[: changes // 2]
+    raw.loc[closing, "Closed Date"] = raw.loc[closing, "Activated Date"] + pd.to_timedelta(rng.integers(0, 40, len(closing)), unit="D")
+    raw.loc[edited, "Changed Date"] = pd.Timestamp("2024-06-01") + pd.Timedelta(days=step)
+    added = generate_work_items(changes, seed=100 + step, first_id=first_id)
+    added["Changed Date"] = pd.Timestamp("2024-06-01") + pd.Timedelta(days=step)
+    return pd.concat([raw, added], ignore_index=True), changes
+
+
+def _assert_same_metrics(incremental, fresh):
+    for scope_key, metrics in fresh.items():
+        for got, expected in zip(incremental[scope_key].as_tuple()[1:], metrics.as_tuple()[1:]):
+            if isinstance(expected, float) and not math.isnan(expected):
+                assert got == pytest.approx(expected, rel=1e-9, abs=1e-9), scope_key
+            elif isinstance(expected, float):
+                assert math.isnan(got), scope_key
+            else:
+                assert got == expected, scope_key
+
+
+@pytest.mark.parametrize("changed_date", [True, False], ids=["changed_date", "field_hash"])
+@pytest.mark.parametrize("share", [0.02, 0.3], ids=["incremental", "recomputed"])
+def test_successive_exports_match_a_fresh_compute(tmp_path, changed_date, share):
+    rng = np.random.default_rng(7)
+    raw = generate_work_items(3000, seed=7)
+    raw["Changed Date"] = pd.Timestamp("2024-05-01")
+    state = ProjectState("team", state_dir=str(tmp_path))
+    changes = 0
+    for step in range(5):
+        export = raw if changed_date else raw.drop(columns="Changed Date")
+        data = export.to_csv(index=False).encode("utf-8")
+        raw_df = parse_work_items(data)
+        update = state.apply_export(raw_df, content_digest(data))
+        assert update.delta.has_previous == bool(step)
+        if step:
+            assert (update.delta.inserted, update.delta.removed) == (changes, changes)
+        _assert_same_metrics(MetricsEngine(raw_df, update.moments).all_scopes(), MetricsEngine(raw_df).all_scopes())
+        # New items never reuse the ID of a removed one
+        raw, changes = _next_export(raw, rng, step + 1, share, first_id=3001 + step * 1000)
@@ -0,0 +1,28 @@
+import math
+import pandas as pd
+import pytest
+from keymetrics import SCOPES, process_key_metrics
+from streaming_metrics import stream_key_metrics
+from synthetic_data import generate_work_items
+
+
+@pytest.fixture(scope="module")
+def export_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("exports") / "export.csv"
+    generate_work_items(5000, seed=11).to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize("scope_key", SCOPES)
+def test_streamed_metrics_match_process_key_metrics(export_path, scope_key):
+    raw_df = pd.read_csv(export_path)
+    sprint = sorted(raw_df["Iteration Path"].dropna().unique())[3] if scope_key == "sprint_review" else None
+    streamed = stream_key_metrics(export_path, chunksize=777)
+    assert streamed.total_rows == len(raw_df)
+    for got, expected in zip(streamed.scope(scope_key, sprint).as_tuple()[1:], process_key_metrics(raw_df, scope_key, sprint)[1:]):
+        if isinstance(expected, float) and math.isnan(expected):
+            assert math.isnan(got)
+        elif isinstance(expected, float):
+            assert got == pytest.approx(expected, rel=1e-9, abs=1e-9)
+        else:
+            assert got == expected